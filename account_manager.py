@@ -5,14 +5,13 @@ Manages multiple cTrader client connections for different accounts.
 """
 
 import logging
-from typing import Dict, Optional, Tuple
-import inspect
-import ctrader_client as ctr_mod
+from typing import Dict, Iterable, Optional, Tuple
 
+from ctrader_client import CTraderClient  # first: installs the epoll/kqueue reactor
+from twisted.internet import defer
 from trade_processor import notify_position_update
-from ctrader_client import CTraderClient
 from config_loader import AccountConfig
-from ctrader_open_api import Protobuf
+from ctrader_utils import extract_cached
 from ctrader_open_api.messages.OpenApiMessages_pb2 import (
     ProtoOAReconcileReq,
     ProtoOAReconcileRes,
@@ -21,15 +20,6 @@ from ctrader_open_api.messages.OpenApiMessages_pb2 import (
 
 logger = logging.getLogger(__name__)
 
-# One‑shot debug: confirm which _on_spot_event implementation is live
-try:
-    logger.info(
-        "DEBUG CTraderClient._on_spot_event SOURCE:\n%s",
-        inspect.getsource(ctr_mod.CTraderClient._on_spot_event),
-    )
-except Exception:
-    logger.info("DEBUG unable to inspect CTraderClient._on_spot_event source")
-
 
 class AccountManager:
     """Manages multiple cTrader client connections."""
@@ -99,15 +89,15 @@ class AccountManager:
         try:
             td = getattr(pos, "tradeData", None)
             if td is not None:
-                v = getattr(td, "volume", 0)
-                if int(v) > 0:
-                    return int(v)
+                v = int(getattr(td, "volume", 0))
+                if v > 0:
+                    return v
         except Exception:
             pass
 
         try:
-            v = getattr(pos, "volume", 0)
-            return int(v) if int(v) > 0 else 0
+            v = int(getattr(pos, "volume", 0))
+            return v if v > 0 else 0
         except Exception:
             return 0
 
@@ -189,7 +179,7 @@ class AccountManager:
             try:
                 self._ensure_account_maps(acc_name)
 
-                extracted = Protobuf.extract(message)
+                extracted = extract_cached(message)
 
                 # 1) Execution events: fills / partial fills / accepts etc.
                 if isinstance(extracted, ProtoOAExecutionEvent):
@@ -323,7 +313,7 @@ class AccountManager:
 
                 def _on_reconcile(result):
                     try:
-                        Protobuf.extract(result)
+                        extract_cached(result)
                         logger.info("[%s] Reconcile response processed", account.name)
                     except Exception as e:
                         logger.warning("[%s] Failed to process reconcile response: %s", account.name, e)
@@ -335,6 +325,37 @@ class AccountManager:
 
         client.connect(on_connect=on_connected)
 
+    # ------------------------------------------------------------------
+    # Order dispatch
+    # ------------------------------------------------------------------
+
+    def dispatch_market_order_multi(self, orders: Iterable[Tuple[str, dict]]) -> defer.DeferredList:
+        """
+        Submit one copied market order per account, back to back.
+
+        orders: (account_name, send_market_order kwargs) pairs, already sized per account.
+        Every request is handed to its client before any response is awaited; each
+        client builds it from its per-account template. Returns a DeferredList
+        (consumeErrors=True) over the submitted orders; accounts that could not
+        submit are logged and left out.
+
+        Runs on the HTTP handler thread, not the reactor: it relies on
+        CTraderClient.send() being thread-safe (cross-thread requests are queued
+        and written by one reactor wake-up per burst).
+        """
+        deferreds = []
+        for acc_name, order in orders:
+            client = self.clients.get(acc_name)
+            if client is None:
+                logger.warning(f"[{acc_name}] No client for market order {order.get('label')}, skipping")
+                continue
+            try:
+                deferreds.append(client.send_market_order(**order))
+                logger.info(f"[{acc_name}] Order submitted: {order.get('label')}")
+            except Exception as e:
+                logger.error(f"[{acc_name}] Failed to submit market order {order.get('label')}: {e}")
+        return defer.DeferredList(deferreds, consumeErrors=True)
+
     # ------------------------------------------------------------------
     # Accessors
     # ------------------------------------------------------------------
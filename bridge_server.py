@@ -9,6 +9,9 @@ from app_state import logger
 from trade_processor import process_trade_event
 
 
+# Identical for every accepted event, so serialized once
+_OK_RESPONSE = json.dumps({"status": "success", "message": "Trade event processed"}).encode("utf-8")
+
 # Lightweight HTTP-layer de-dupe
 DEDUPE_WINDOW_MS = 2000
 _event_dedupe = {}  # (event_type, ticket) -> last_seen_ms
@@ -55,8 +58,8 @@ class MT5BridgeHandler(BaseHTTPRequestHandler):
         """Handle POST request with trade event JSON."""
         try:
             content_length = int(self.headers.get("Content-Length", 0))
-            body = self.rfile.read(content_length).decode("utf-8")
-            data = json.loads(body)
+            body = self.rfile.read(content_length)
+            data = json.loads(body)  # bytes in: no separate decode copy
 
             # Backward compatibility: normalize field names
             # Support: 'action' (MT5), 'event' (old), 'event_type' (new)
@@ -86,9 +89,7 @@ class MT5BridgeHandler(BaseHTTPRequestHandler):
             self.send_response(200)
             self.send_header("Content-Type", "application/json")
             self.end_headers()
-            self.wfile.write(
-                json.dumps({"status": "success", "message": "Trade event processed"}).encode("utf-8")
-            )
+            self.wfile.write(_OK_RESPONSE)
 
         except json.JSONDecodeError as e:
             logger.error(f"Invalid JSON received: {e}")
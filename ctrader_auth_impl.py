@@ -8,12 +8,19 @@ Uses:
   - self.account_id, self.access_token
   - self.client (low-level OpenApiPy Client)
   - self.is_app_authed, self.is_account_authed
-  - self._on_error, self._load_symbol_map
+  - self._on_error, self._load_symbol_map, self._start_monitor
   - self._on_connect_callback
+  - self._connect_subscribe_ids, self._active_spot_subs, self._send_subscribe
+
+When account credentials are already set at connect time, app auth, account auth,
+SymbolsList and the optional spot subscription are written back-to-back on the
+wire (the server handles one connection's requests in order), instead of waiting
+one round trip per step.
 """
 
 import logging
-from ctrader_open_api import Protobuf
+from twisted.internet import defer
+from ctrader_utils import extract_cached
 from ctrader_open_api.messages.OpenApiMessages_pb2 import (
     ProtoOAApplicationAuthReq,
     ProtoOAApplicationAuthRes,
@@ -40,13 +47,30 @@ def authenticate_app(self) -> None:
     req.clientSecret = self.client_secret
 
     d = self.client.send(req)
-    d.addCallback(lambda result: on_app_auth_success(self, result))
-    d.addErrback(self._on_error)
+
+    if not (self.account_id and self.access_token):
+        d.addCallback(lambda result: on_app_auth_success(self, result))
+        d.addErrback(self._on_error)
+        return
+
+    d.addCallback(lambda result: on_app_auth_success(self, result, pipelined=True))
+    steps = [d, send_account_auth(self)]
+
+    symbols_d = self._load_symbol_map()
+    if symbols_d is not None:
+        steps.append(symbols_d)
+
+    subscribe_d = subscribe_connect_spots(self)
+    if subscribe_d is not None:
+        steps.append(subscribe_d)
+
+    logger.info("Pipelined %d startup requests", len(steps))
+    defer.gatherResults(steps, consumeErrors=True).addErrback(self._on_error)
 
 
-def on_app_auth_success(self, result) -> None:
+def on_app_auth_success(self, result, pipelined: bool = False) -> None:
     try:
-        payload = Protobuf.extract(result)
+        payload = extract_cached(result)
     except Exception:
         logger.exception("Failed to extract app auth response")
         return
@@ -57,8 +81,11 @@ def on_app_auth_success(self, result) -> None:
 
     logger.info("Application authenticated successfully")
     self.is_app_authed = True
+    self._start_monitor()
 
-    # Only now proceed to account auth
+    # Only now proceed to account auth (already on the wire when pipelined)
+    if pipelined:
+        return
     if self.account_id and self.access_token:
         authorize_account(self)
     else:
@@ -80,6 +107,12 @@ def authorize_account(self) -> None:
         logger.error("Account ID or access token missing")
         return
 
+    d = send_account_auth(self, pipelined=False)
+    d.addErrback(self._on_error)
+
+
+def send_account_auth(self, pipelined: bool = True):
+    """Send ProtoOAAccountAuthReq; returns the Deferred (no errback attached)."""
     logger.info("Authorizing account %s...", self.account_id)
 
     req = ProtoOAAccountAuthReq()
@@ -87,13 +120,13 @@ def authorize_account(self) -> None:
     req.accessToken = self.access_token
 
     d = self.client.send(req)
-    d.addCallback(lambda result: on_account_auth_success(self, result))
-    d.addErrback(self._on_error)
+    d.addCallback(lambda result: on_account_auth_success(self, result, pipelined=pipelined))
+    return d
 
 
-def on_account_auth_success(self, result) -> None:
+def on_account_auth_success(self, result, pipelined: bool = False) -> None:
     try:
-        payload = Protobuf.extract(result)
+        payload = extract_cached(result)
     except Exception:
         logger.exception("Failed to extract account auth response")
         return
@@ -105,8 +138,27 @@ def on_account_auth_success(self, result) -> None:
     logger.info("Account %s authorized successfully", self.account_id)
     self.is_account_authed = True
 
-    # Load symbols only AFTER confirmed account auth
+    # Load symbols only AFTER confirmed account auth (already requested when pipelined)
+    if pipelined:
+        return
     try:
         self._load_symbol_map()
     except Exception:
         logger.exception("Symbol map loading failed")
+
+    d = subscribe_connect_spots(self)
+    if d is not None:
+        d.addErrback(self._on_error)
+
+
+def subscribe_connect_spots(self):
+    """
+    Subscribe the symbolIds given to connect() right away (no debounce window:
+    this is a single startup request). Returns the Deferred, or None if none.
+    """
+    active = self._active_spot_subs
+    ids = [i for i in dict.fromkeys(map(int, self._connect_subscribe_ids or ())) if i > 0 and i not in active]
+    if not ids:
+        return None
+    active.update(ids)
+    return self._send_subscribe(int(self.account_id), ids)
@@ -5,41 +5,259 @@ Provides high-level trading methods wrapping the low-level OpenApiPy SDK.
 """
 
 import os
+import sys
 import time
+import socket
 import logging
-from typing import Optional, Callable, Dict, Any, Iterable
+import threading
+from array import array
+from collections import OrderedDict, deque
+from typing import TYPE_CHECKING, Optional, Callable, Dict, Any, Iterable, Deque, List, Set, Tuple
 
 from dotenv import load_dotenv
-from twisted.internet import reactor
+
+
+def _install_fast_reactor() -> None:
+    """
+    Install the epoll (Linux) or kqueue (BSD/macOS) reactor.
+
+    Must run before anything imports twisted.internet.reactor; entrypoints should
+    import this module first. If a reactor is already installed it is kept.
+    """
+    if "twisted.internet.reactor" in sys.modules:
+        return
+    try:
+        if sys.platform.startswith("linux"):
+            from twisted.internet import epollreactor
+
+            epollreactor.install()
+        elif sys.platform == "darwin" or "bsd" in sys.platform:
+            from twisted.internet import kqueuereactor
+
+            kqueuereactor.install()
+    except Exception:
+        # Fall back to Twisted's default reactor selection
+        pass
+
+
+_install_fast_reactor()
+
+from twisted.internet import reactor  # noqa: E402  (must follow reactor install)
+from twisted.internet import defer  # noqa: E402
+from twisted.python import threadable  # noqa: E402
+from twisted.python.failure import Failure  # noqa: E402
 
 from ctrader_utils import convert_mt5_lots_to_ctrader_cents  # kept for compatibility
+from ctrader_utils import extract_cached
 import ctrader_symbols_impl as symbols_impl
 import ctrader_monitor_impl as monitor_impl
 import ctrader_auth_impl as auth_impl
 import ctrader_trading_impl as trading_impl
 
-from ctrader_open_api import Client, Protobuf, TcpProtocol, EndPoints
-from ctrader_open_api.messages.OpenApiMessages_pb2 import (
-    ProtoOASubscribeSpotsReq,
-    ProtoOAUnsubscribeSpotsReq,
-    ProtoOASpotEvent,
-)
+from ctrader_open_api import Client, TcpProtocol, EndPoints
+
+if TYPE_CHECKING:
+    from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOASpotEvent
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
-# Cache numeric payloadType for spot events
-PROTO_OA_SPOT_EVENT_TYPE = ProtoOASpotEvent().payloadType
+
+def _check_protobuf_backend() -> None:
+    """
+    Warn when protobuf runs on its pure-Python backend.
+
+    Symbol lists with thousands of ProtoOASymbol entries and every spot event are
+    parsed by protobuf; the upb/cpp backends shipped in protobuf >= 4.21 wheels are an
+    order of magnitude faster. The backend is not forced here: selecting one that is
+    not installed only emits a warning and falls back.
+    """
+    try:
+        from google.protobuf.internal import api_implementation
+
+        backend = api_implementation.Type()
+    except Exception:
+        return
+    if backend == "python":
+        logger.warning(
+            "protobuf is using the pure-Python backend; install protobuf>=4.21 (upb) "
+            "for much faster message parsing"
+        )
+    else:
+        logger.debug("protobuf backend: %s", backend)
+
+
+_check_protobuf_backend()
+
+# Numeric payloadType for spot events (ProtoOAPayloadType.PROTO_OA_SPOT_EVENT).
+# Kept as a literal so this module does not load OpenApiMessages_pb2 at import time;
+# the request classes below are imported on first use.
+PROTO_OA_SPOT_EVENT_TYPE = 2131
+
+# Upper bound on symbolIds per spot (un)subscribe request, keeps each frame small
+MAX_SPOT_SYMBOLS_PER_REQ = 500
+
+
+def _raise_on_error_res(result):
+    """Deferred callback: raise if the server answered with ProtoOAErrorRes."""
+    from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOAErrorRes
+
+    msg = extract_cached(result)
+    if isinstance(msg, ProtoOAErrorRes):
+        raise RuntimeError("%s: %s" % (msg.errorCode, msg.description))
+    return result
+
+
+def _run_for_batch(result, fn: Optional[Callable[[List[int]], None]], batch: List[int]):
+    """Deferred callback/errback: fn(batch), then pass the result (or Failure) on."""
+    if fn is not None:
+        fn(batch)
+    return result
+
+
+def _unwrap_first_error(failure: Failure) -> Failure:
+    """gatherResults() wraps the failed request's Failure in FirstError; unwrap it."""
+    if failure.check(defer.FirstError):
+        return failure.value.subFailure
+    return failure
+
+
+class SpotQuote:
+    """
+    Read-only quote snapshot; q.bid / q.ask / q.ts. Dict-style callers of the old
+    {"bid", "ask", "ts"} quote dict keep working: q["bid"], q.get("bid"), "bid" in q,
+    q.keys(); unknown keys raise KeyError like the dict did.
+    """
+
+    __slots__ = ("bid", "ask", "ts")
+
+    def __init__(self, bid: float, ask: float, ts: int):
+        self.bid = bid
+        self.ask = ask
+        self.ts = ts
+
+    def __getitem__(self, key: str):
+        if key in self.__slots__:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.__slots__
+
+    def keys(self) -> Tuple[str, ...]:
+        return self.__slots__
+
+    def __repr__(self) -> str:
+        return "SpotQuote(bid=%r, ask=%r, ts=%r)" % (self.bid, self.ask, self.ts)
+
+
+class SpotQuoteTable:
+    """
+    Struct-of-arrays spot quote cache: symbolId -> row in parallel bid/ask/ts arrays.
+    Rows are preallocated (zeroed, grown by doubling), so per-tick updates are plain
+    scalar stores with no allocation; SpotQuote records are only built on read.
+    Bounded to max_symbols rows: the least recently updated symbol is evicted and
+    its row reused, as are rows released by discard().
+    """
+
+    __slots__ = ("_rows", "_free", "_used", "_bid", "_ask", "_ts", "max_symbols")
+
+    def __init__(self, max_symbols: int = 1024, capacity: int = 256):
+        self._rows: "OrderedDict[int, int]" = OrderedDict()
+        self._free: List[int] = []
+        self._used = 0
+        self._bid = array("d")
+        self._ask = array("d")
+        self._ts = array("q")
+        self.max_symbols = int(max_symbols)
+        self.reserve(capacity)
+
+    def reserve(self, capacity: int) -> None:
+        """Preallocate zeroed rows up to capacity (capped at max_symbols)."""
+        extra = min(int(capacity), self.max_symbols) - len(self._bid)
+        if extra > 0:
+            self._bid.extend(array("d", bytes(8 * extra)))
+            self._ask.extend(array("d", bytes(8 * extra)))
+            self._ts.extend(array("q", bytes(8 * extra)))
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, symbol_id) -> bool:
+        return symbol_id in self._rows
+
+    def update(self, symbol_id: int, bid: Optional[float], ask: Optional[float], ts: int) -> None:
+        """Store a quote in place; a None bid/ask keeps the previously stored side."""
+        row = self._rows.get(symbol_id)
+        if row is not None:
+            self._rows.move_to_end(symbol_id)
+            if bid is not None:
+                self._bid[row] = bid
+            if ask is not None:
+                self._ask[row] = ask
+            self._ts[row] = ts
+            return
+
+        if bid is None:
+            bid = 0.0
+        if ask is None:
+            ask = 0.0
+
+        if self._free:
+            row = self._free.pop()
+        elif self._used < self.max_symbols:
+            row = self._used
+            self._used += 1
+            if row >= len(self._bid):
+                self.reserve(2 * len(self._bid) or 1)
+        else:
+            row = self._rows.popitem(last=False)[1]
+
+        self._rows[symbol_id] = row
+        self._bid[row] = bid
+        self._ask[row] = ask
+        self._ts[row] = ts
+
+    def discard(self, symbol_id: int) -> None:
+        row = self._rows.pop(symbol_id, None)
+        if row is not None:
+            self._free.append(row)
+
+    def get(self, symbol_id: int) -> Optional[SpotQuote]:
+        row = self._rows.get(symbol_id)
+        if row is None:
+            return None
+        return SpotQuote(self._bid[row], self._ask[row], self._ts[row])
+
+
+# App credentials from .env, read once per process (see _load_app_credentials)
+_dotenv_loaded = False
+_CTRADER_CLIENT_ID: Optional[str] = None
+_CTRADER_CLIENT_SECRET: Optional[str] = None
+
+
+def _load_app_credentials(force: bool = False) -> None:
+    """Parse .env and cache the app credentials; force=True re-reads them."""
+    global _dotenv_loaded, _CTRADER_CLIENT_ID, _CTRADER_CLIENT_SECRET
+    if _dotenv_loaded and not force:
+        return
+    load_dotenv()
+    _CTRADER_CLIENT_ID = os.getenv("CTRADER_CLIENT_ID")
+    _CTRADER_CLIENT_SECRET = os.getenv("CTRADER_CLIENT_SECRET")
+    _dotenv_loaded = True
 
 
 class CTraderClient:
     """High-level wrapper for cTrader Open API trading operations."""
 
     def __init__(self, env: str = "demo"):
-        load_dotenv()
+        _load_app_credentials()
 
-        self.client_id = os.getenv("CTRADER_CLIENT_ID")
-        self.client_secret = os.getenv("CTRADER_CLIENT_SECRET")
+        self.client_id = _CTRADER_CLIENT_ID
+        self.client_secret = _CTRADER_CLIENT_SECRET
 
         if not self.client_id or not self.client_secret:
             raise ValueError("CTRADER_CLIENT_ID and CTRADER_CLIENT_SECRET must be set in .env")
@@ -58,22 +276,92 @@ class CTraderClient:
 
         # Symbol maps (populated after account auth)
         self.symbol_name_to_id: Dict[str, int] = {}
-        self.symbol_details: Dict[int, object] = {}
-
-        # Spot quote cache: symbolId -> {"bid": float, "ask": float, "ts": int}
-        # Filled only if you subscribe to spots.
-        self.spot_quotes: Dict[int, Dict[str, Any]] = {}
-
-        # Health monitoring
-        self.heartbeat_task = None
-        self.health_check_task = None
+        self.symbol_id_to_name: Dict[int, str] = {}
+        self.symbol_details: Dict[int, symbols_impl.SymbolSpec] = {}
+        # symbolId -> float(10 ** digits), filled from full symbol specs (see round_price_for_symbol)
+        self._round_factor: Dict[int, float] = {}
+        # symbolId -> (minVolume, maxVolume, stepVolume); symbols without volume limits have no entry
+        self._volume_spec: Dict[int, Tuple[int, int, int]] = {}
+        # symbolIds per SymbolById request; halved if the server rejects a batch
+        self.symbol_spec_batch_size = 200
+
+        # Spot quote cache: symbolId -> (bid, ask, ts), see get_last_quote().
+        # Filled only if you subscribe to spots; LRU-bounded to max_spot_cache symbols.
+        self.max_spot_cache = 1024
+        self.spot_quotes = SpotQuoteTable(self.max_spot_cache)
+
+        # symbolIds currently subscribed on this connection (subscribe_spots sends the delta)
+        self._active_spot_subs: Set[int] = set()
+
+        # Debounced spot subscriptions: account_id -> ids / waiting Deferreds
+        self.spot_subscribe_debounce = 0.05
+        self._spot_sub_pending: Dict[int, List[int]] = {}
+        self._spot_sub_waiters: Dict[int, List[defer.Deferred]] = {}
+        self._spot_sub_flush_call = None
+
+        # Health monitoring (last_message_time is time.monotonic(), immune to clock jumps;
+        # refreshed per monitor tick from _msg_count, so its resolution is heartbeat_interval)
+        self.monitor_task = None
         self.heartbeat_interval = 30
-        self.last_message_time = time.time()
+        self.last_message_time = time.monotonic()
         self.max_idle_time = 120
 
+        # Receive counters, logged and reset by the monitor tick (no per-message logging)
+        self._msg_count = 0
+        self._spot_update_count = 0
+
+        # Event-loop lag telemetry (see get_event_loop_lag()); above lag_threshold_ms
+        # spot events are coalesced per symbol and applied once per reactor turn
+        self.lag_call = None
+        self.lag_interval = 1.0
+        self.lag_threshold_ms = 50.0
+        self.spot_coalesce = False
+        self.last_lag_ms = 0.0
+        self.max_lag_ms_60s = 0.0
+        self.lag_histogram = [0] * (len(monitor_impl.LAG_BUCKETS_MS) + 1)
+        self._lag_expected = 0.0
+        self._lag_window_start = 0.0
+        # symbolId -> [bid, ask, ts] merged while coalescing (None = side not sent yet)
+        self._spot_pending: Dict[int, list] = {}
+        self._spot_pending_scheduled = False
+
+        # TCP keepalive tuning (seconds / probe count), applied on every connect
+        self.tcp_keepalive_idle = 15
+        self.tcp_keepalive_interval = 5
+        self.tcp_keepalive_count = 3
+
+        # Per-account protobuf request templates (see ctrader_trading_impl._from_template)
+        self._request_templates: Dict[Any, Any] = {}
+
+        # Requests sent from non-reactor threads: (req, Deferred), drained by one wake-up per burst
+        self._send_queue: Deque[Tuple[Any, defer.Deferred]] = deque()
+        self._send_queue_lock = threading.Lock()
+        self._send_drain_scheduled = False
+
+        # _on_error rate limiting (per one-second window)
+        self.max_errors_per_sec = 10
+        self._err_window_start = 0.0
+        self._err_count = 0
+        self._err_suppressed = 0
+
         # Callbacks
         self._on_connect_callback: Optional[Callable] = None
         self._on_message_callback: Optional[Callable] = None
+        # set_message_callback(..., include_spots=True) also forwards spot events
+        self._forward_spots = False
+        self._on_spot_batch_callback: Optional[Callable] = None
+
+        # symbolIds to subscribe during the pipelined startup (see connect())
+        self._connect_subscribe_ids: List[int] = []
+
+        # symbolIds updated since the last spot batch flush (one flush per reactor turn)
+        self._spot_batch: set = set()
+        self._spot_batch_scheduled = False
+
+        # payloadType -> handler(message) for messages consumed by the client itself
+        self._payload_handlers: Dict[int, Callable] = {
+            PROTO_OA_SPOT_EVENT_TYPE: self._on_spot_message,
+        }
 
         # Wire SDK callbacks
         self.client.setConnectedCallback(self._handle_connected)
@@ -89,12 +377,12 @@ class CTraderClient:
     def _handle_connected(self, client):
         logger.info("Connected to cTrader Open API")
         self.is_connected = True
-        self.last_message_time = time.time()
+        self.last_message_time = time.monotonic()
 
-        self._authenticate_app()
+        self.client.whenConnected().addCallback(self._tune_transport)
 
-        reactor.callLater(5, self._start_heartbeat)
-        reactor.callLater(5, self._start_health_check)
+        # The heartbeat/health monitor starts once the app is authenticated
+        self._authenticate_app()
 
         # If the user provided a connect callback, call it.
         # (AccountManager uses this to immediately reconcile.)
@@ -104,40 +392,68 @@ class CTraderClient:
             except Exception:
                 logger.exception("on_connect callback crashed")
 
+    def _tune_transport(self, protocol):
+        """Disable Nagle and enable fast dead-peer detection on the live socket."""
+        transport = getattr(protocol, "transport", None)
+        if transport is None:
+            return protocol
+
+        try:
+            transport.setTcpNoDelay(True)
+            transport.setTcpKeepAlive(True)
+
+            # TLS wrappers proxy unknown attributes to the underlying TCP transport
+            sock = getattr(transport, "socket", None)
+            if sock is not None:
+                # macOS names the idle option TCP_KEEPALIVE instead of TCP_KEEPIDLE
+                idle_opt = "TCP_KEEPIDLE" if hasattr(socket, "TCP_KEEPIDLE") else "TCP_KEEPALIVE"
+                for opt, value in (
+                    (idle_opt, self.tcp_keepalive_idle),
+                    ("TCP_KEEPINTVL", self.tcp_keepalive_interval),
+                    ("TCP_KEEPCNT", self.tcp_keepalive_count),
+                ):
+                    if hasattr(socket, opt):
+                        sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, opt), int(value))
+        except Exception:
+            logger.debug("TCP socket tuning failed", exc_info=True)
+
+        return protocol
+
     def _handle_disconnected(self, client, reason):
         logger.warning("Disconnected from cTrader: %s", reason)
         self.is_connected = False
         self.is_app_authed = False
         self.is_account_authed = False
-        self.symbol_name_to_id.clear()
-        self.symbol_details.clear()
-        self.spot_quotes.clear()
+        # Rebind instead of clear(): dropping the old tables avoids an O(N)
+        # per-entry teardown on the reactor thread before reconnecting.
+        # Full symbol specs (symbol_details, _round_factor, _volume_spec) are kept:
+        # the next SymbolsList prunes them and SymbolById only fetches what is missing.
+        self.symbol_name_to_id = {}
+        self.symbol_id_to_name = {}
+        self.spot_quotes = SpotQuoteTable(self.max_spot_cache)
+        self._spot_pending = {}
+        self._active_spot_subs = set()
+        self._cancel_spot_subscriptions()
         self._stop_periodic_tasks()
 
     def _handle_message(self, client, message):
-        self.last_message_time = time.time()
-
-        extracted = None
-        payload_type = None
-        try:
-            extracted = Protobuf.extract(message)
-            payload_type = getattr(extracted, "payloadType", None)
-            logger.info(
-                "Received message payloadType=%s type=%s",
-                payload_type,
-                type(extracted),
-            )
-        except Exception:
-            logger.info("Received raw message (extract failed): %r", message)
-            extracted = None
-
-        # Internal handling: route spot events by payloadType only
-        try:
-            if payload_type == PROTO_OA_SPOT_EVENT_TYPE:
-                logger.info("ROUTE: ProtoOASpotEvent by payloadType")
-                self._on_spot_event(extracted)
-        except Exception:
-            logger.debug("Failed to process spot event", exc_info=True)
+        # No clock read per frame: the monitor tick advances last_message_time
+        # when _msg_count shows traffic since the previous tick.
+
+        # TcpProtocol always delivers a ProtoMessage envelope, so payloadType is
+        # read directly and dispatched through an int -> handler table
+        payload_type = message.payloadType
+        self._msg_count += 1
+
+        # Internally handled payloads (spot events) are consumed here and only
+        # forwarded to the message callback if it opted in (include_spots). They
+        # only exist after account auth, so pre-auth frames skip the table lookup.
+        if self.is_account_authed:
+            handler = self._payload_handlers.get(payload_type)
+            if handler is not None:
+                handler(message)
+                if not self._forward_spots:
+                    return
 
         # Forward raw message to user callback (AccountManager parses it)
         if self._on_message_callback:
@@ -146,67 +462,93 @@ class CTraderClient:
             except Exception:
                 logger.exception("User message callback crashed")
 
-    def _on_spot_event(self, spot_event: ProtoOASpotEvent):
-        spots = list(getattr(spot_event, "spot", []))
-        if not spots:
-            # was: logger.info(">> _on_spot_event: 0 entries")
-            return
-    
-        # was: logger.info(">> _on_spot_event: %d entries", len(spots))
+    def _on_spot_message(self, message):
+        try:
+            self._on_spot_event(extract_cached(message))
+        except Exception:
+            logger.debug("Failed to process spot event", exc_info=True)
+
+    def _on_spot_event(self, spot_event: "ProtoOASpotEvent"):
+        # ProtoOASpotEvent carries one symbol's quote (there is no repeated "spot" field)
+        # Generated protobuf fields are plain ints with 0 defaults; no getattr/coercion
         try:
-            for s in spots:
-                symbol_id = int(getattr(s, "symbolId", 0) or 0)
-                bid_raw = getattr(s, "bid", 0)
-                ask_raw = getattr(s, "ask", 0)
-                ts = int(getattr(s, "timestamp", 0) or 0)
-    
-                # was a very noisy info log:
-                # logger.info(
-                #     "SPOT RAW sid=%s bid_raw=%s ask_raw=%s ts=%s",
-                #     symbol_id, bid_raw, ask_raw, ts,
-                # )
-    
-                if not symbol_id:
-                    continue
-    
-                bid = float(bid_raw or 0.0)
-                ask = float(ask_raw or 0.0)
-                self.spot_quotes[symbol_id] = {"bid": bid, "ask": ask, "ts": ts}
-    
-                # Optional: keep at debug if you still want to inspect sometimes
-                # symbol_name = None
-                # for name, sid in self.symbol_name_to_id.items():
-                #     if sid == symbol_id:
-                #         symbol_name = name
-                #         break
-                #
-                # if symbol_name:
-                #     logger.debug(
-                #         "QUOTE %s | bid=%.5f ask=%.5f ts=%s",
-                #         symbol_name, bid, ask, ts,
-                #     )
-                # else:
-                #     logger.debug(
-                #         "QUOTE symbolId=%s | bid=%.5f ask=%.5f ts=%s",
-                #         symbol_id, bid, ask, ts,
-                #     )
+            symbol_id = spot_event.symbolId
+            if not symbol_id:
+                return
+
+            # Only changed sides are sent; an absent side keeps its stored value
+            has_field = spot_event.HasField
+            bid = spot_event.bid if has_field("bid") else None
+            ask = spot_event.ask if has_field("ask") else None
+            ts = spot_event.timestamp
         except Exception:
             logger.debug("spot event parse error", exc_info=True)
-    
+            return
 
+        if not self.spot_coalesce:
+            self._apply_spot(symbol_id, bid, ask, ts)
+            return
+
+        # Under event-loop lag: merge into the symbol's pending quote (no event is
+        # dropped, a side absent here keeps the one merged earlier) and apply once per turn
+        pending = self._spot_pending.get(symbol_id)
+        if pending is None:
+            self._spot_pending[symbol_id] = [bid, ask, ts]
+        else:
+            if bid is not None:
+                pending[0] = bid
+            if ask is not None:
+                pending[1] = ask
+            pending[2] = ts
+        if not self._spot_pending_scheduled:
+            self._spot_pending_scheduled = True
+            reactor.callLater(0, self._flush_spot_pending)
+
+    def _flush_spot_pending(self):
+        """Apply every coalesced quote (latest bid/ask per symbolId) in one pass."""
+        self._spot_pending_scheduled = False
+        pending, self._spot_pending = self._spot_pending, {}
+        for symbol_id, (bid, ask, ts) in pending.items():
+            self._apply_spot(symbol_id, bid, ask, ts)
+
+    def _apply_spot(self, symbol_id: int, bid: Optional[float], ask: Optional[float], ts: int):
+        try:
+            self.spot_quotes.update(symbol_id, bid, ask, ts)
+            self._spot_update_count += 1
+        except Exception:
+            logger.debug("spot quote update error", exc_info=True)
+            return
+
+        if self._on_spot_batch_callback is not None:
+            self._spot_batch.add(symbol_id)
+            if not self._spot_batch_scheduled:
+                self._spot_batch_scheduled = True
+                reactor.callLater(0, self._flush_spot_batch)
+
+    def _flush_spot_batch(self):
+        """Deliver all symbolIds updated since the last flush in one callback."""
+        self._spot_batch_scheduled = False
+        batch, self._spot_batch = self._spot_batch, set()
+        if not batch or self._on_spot_batch_callback is None:
+            return
+        try:
+            self._on_spot_batch_callback(batch)
+        except Exception:
+            logger.exception("Spot batch callback crashed")
 
     # ------------------------------------------------------------------
     # Heartbeat / health (delegated to ctrader_monitor_impl.py)
     # ------------------------------------------------------------------
 
-    def _start_heartbeat(self):
-        return monitor_impl.start_heartbeat(self)
+    def _start_monitor(self):
+        return monitor_impl.start_monitor(self)
 
     def _send_heartbeat(self):
         return monitor_impl.send_heartbeat(self)
 
-    def _start_health_check(self):
-        return monitor_impl.start_health_check(self)
+    def get_event_loop_lag(self) -> Dict[str, Any]:
+        """Reactor lag stats: last/60s-max in ms, histogram, whether spots are coalesced."""
+        return monitor_impl.get_event_loop_lag(self)
 
     def _check_connection_health(self):
         return monitor_impl.check_connection_health(self)
@@ -250,6 +592,11 @@ class CTraderClient:
     def round_price_for_symbol(self, symbol_id: int, price: float) -> float:
         return symbols_impl.round_price_for_symbol(self, symbol_id, price)
 
+    def round_prices_for_symbol(
+        self, symbol_id: int, prices: Tuple[Optional[float], ...]
+    ) -> Tuple[Optional[float], ...]:
+        return symbols_impl.round_prices_for_symbol(self, symbol_id, prices)
+
     def snap_volume_for_symbol(self, symbol_id: int, volume_cents: int) -> int:
         return symbols_impl.snap_volume_for_symbol(self, symbol_id, volume_cents)
 
@@ -259,22 +606,145 @@ class CTraderClient:
 
     def subscribe_spots(self, account_id: int, symbol_ids: Iterable[int]):
         """
-        Subscribe to spot prices for given symbolIds.
+        Subscribe to spot prices for given symbolIds in as few requests as possible.
+        Only ids not already subscribed are sent (see self._active_spot_subs), and calls
+        made within spot_subscribe_debounce seconds are flushed as one request.
         After this, you'll receive ProtoOASpotEvent updates and self.spot_quotes will fill.
         """
-        req = ProtoOASubscribeSpotsReq()
-        req.ctidTraderAccountId = int(account_id)
-        req.symbolId.extend([int(x) for x in symbol_ids if int(x) > 0])
-        return self.send(req)
+        active = self._active_spot_subs
+        ids = [i for i in dict.fromkeys(map(int, symbol_ids)) if i > 0 and i not in active]
+        if not ids:
+            return defer.succeed(None)
+
+        active.update(ids)
+        account_id = int(account_id)
+        if self.spot_subscribe_debounce <= 0:
+            return self._send_subscribe(account_id, ids)
+
+        self._spot_sub_pending.setdefault(account_id, []).extend(ids)
+        d = defer.Deferred()
+        self._spot_sub_waiters.setdefault(account_id, []).append(d)
+        if self._spot_sub_flush_call is None:
+            self._spot_sub_flush_call = reactor.callLater(
+                self.spot_subscribe_debounce, self._flush_spot_subscriptions
+            )
+        return d
+
+    def _flush_spot_subscriptions(self):
+        """Send every debounced subscription as one request per account."""
+        self._spot_sub_flush_call = None
+        pending, self._spot_sub_pending = self._spot_sub_pending, {}
+        waiters, self._spot_sub_waiters = self._spot_sub_waiters, {}
+
+        for account_id, account_waiters in waiters.items():
+            ids = pending.get(account_id)
+            d = self._send_subscribe(account_id, ids) if ids else defer.succeed(None)
+
+            def _fan_out(result, account_waiters=account_waiters):
+                for w in account_waiters:
+                    if isinstance(result, Failure):
+                        w.errback(result)
+                    else:
+                        w.callback(result)
+
+            d.addBoth(_fan_out)
+
+    def _cancel_spot_subscriptions(self):
+        """Drop debounced subscriptions that were not sent (e.g. on disconnect)."""
+        if self._spot_sub_flush_call is not None and self._spot_sub_flush_call.active():
+            self._spot_sub_flush_call.cancel()
+        self._spot_sub_flush_call = None
+        self._spot_sub_pending = {}
+        waiters, self._spot_sub_waiters = self._spot_sub_waiters, {}
+        for account_waiters in waiters.values():
+            for w in account_waiters:
+                w.errback(Failure(ConnectionError("Disconnected before spot subscription was sent")))
+
+    def _send_subscribe(self, account_id: int, ids: List[int]):
+        from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOASubscribeSpotsReq
+
+        # Size the quote table for the whole subscribed set before ticks arrive
+        self.spot_quotes.reserve(len(self._active_spot_subs))
+
+        # A failed request (errback or ProtoOAErrorRes, e.g. INVALID_SYMBOL) rolls back
+        # only its own batch of ids, so they can be subscribed again
+        def _forget(batch):
+            self._active_spot_subs.difference_update(batch)
+
+        return self._send_spot_batches(ProtoOASubscribeSpotsReq, account_id, ids, on_failed=_forget)
 
     def unsubscribe_spots(self, account_id: int, symbol_ids: Iterable[int]):
-        req = ProtoOAUnsubscribeSpotsReq()
-        req.ctidTraderAccountId = int(account_id)
-        req.symbolId.extend([int(x) for x in symbol_ids if int(x) > 0])
-        return self.send(req)
+        """Unsubscribe active symbolIds and drop their cached quotes once the server confirms."""
+        from ctrader_open_api.messages.OpenApiMessages_pb2 import ProtoOAUnsubscribeSpotsReq
+
+        active = self._active_spot_subs
+        ids = [i for i in dict.fromkeys(map(int, symbol_ids)) if i in active]
+        if not ids:
+            return defer.succeed(None)
+
+        active.difference_update(ids)
+
+        # Ids still waiting in the debounce window are simply not sent
+        pending = self._spot_sub_pending.get(int(account_id))
+        if pending:
+            dropped = set(ids).intersection(pending)
+            if dropped:
+                pending[:] = [i for i in pending if i not in dropped]
+                ids = [i for i in ids if i not in dropped]
+                if not ids:
+                    return defer.succeed(None)
+
+        # Quotes are dropped per confirmed batch; a failed batch keeps its quotes
+        def _drop_quotes(batch):
+            for sid in batch:
+                self.spot_quotes.discard(sid)
+
+        return self._send_spot_batches(ProtoOAUnsubscribeSpotsReq, account_id, ids, on_sent=_drop_quotes)
+
+    def _send_spot_batches(
+        self,
+        req_cls,
+        account_id: int,
+        ids: List[int],
+        on_sent: Optional[Callable[[List[int]], None]] = None,
+        on_failed: Optional[Callable[[List[int]], None]] = None,
+    ):
+        """
+        Send one (un)subscribe request per MAX_SPOT_SYMBOLS_PER_REQ symbolIds.
 
-    def get_last_quote(self, symbol_id: int) -> Optional[Dict[str, Any]]:
-        """Returns {'bid': float, 'ask': float, 'ts': int} if available."""
+        A request fails on an errback or a ProtoOAErrorRes response; on_sent(batch) /
+        on_failed(batch) then run with that request's ids only. The returned Deferred
+        has the same contract whether or not the ids were split: it fires with the
+        response (a list of them when split), or fails with the first failed request's
+        Failure.
+        """
+        account_id = int(account_id)
+
+        deferreds = []
+        for start in range(0, len(ids), MAX_SPOT_SYMBOLS_PER_REQ):
+            batch = ids[start:start + MAX_SPOT_SYMBOLS_PER_REQ]
+            req = req_cls()
+            req.ctidTraderAccountId = account_id
+            req.symbolId.extend(batch)
+            d = self.send(req)
+            d.addCallback(_raise_on_error_res)
+            if on_sent is not None or on_failed is not None:
+                d.addCallbacks(
+                    _run_for_batch,
+                    _run_for_batch,
+                    callbackArgs=(on_sent, batch),
+                    errbackArgs=(on_failed, batch),
+                )
+            deferreds.append(d)
+
+        if len(deferreds) == 1:
+            return deferreds[0]
+        d = defer.gatherResults(deferreds, consumeErrors=True)
+        d.addErrback(_unwrap_first_error)
+        return d
+
+    def get_last_quote(self, symbol_id: int) -> Optional[SpotQuote]:
+        """Returns a SpotQuote (bid: float, ask: float, ts: int; read-only, dict-style access too) if available."""
         return self.spot_quotes.get(int(symbol_id))
 
     # ------------------------------------------------------------------
@@ -282,11 +752,24 @@ class CTraderClient:
     # ------------------------------------------------------------------
 
     def _on_error(self, failure):
-        logger.error("Deferred error: %s", failure)
-        try:
-            failure.printTraceback()
-        except Exception:
-            pass
+        # Rate-limited: at most max_errors_per_sec lines per second, rest counted
+        now = time.monotonic()
+        if now - self._err_window_start >= 1.0:
+            if self._err_suppressed:
+                logger.error("Suppressed %d deferred errors in the last second", self._err_suppressed)
+            self._err_window_start = now
+            self._err_count = 0
+            self._err_suppressed = 0
+
+        self._err_count += 1
+        if self._err_count > self.max_errors_per_sec:
+            self._err_suppressed += 1
+            return
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.error("Deferred error: %s\n%s", failure.getErrorMessage(), failure.getTraceback())
+        else:
+            logger.error("Deferred error: %s: %s", failure.type.__name__, failure.getErrorMessage())
 
     # ------------------------------------------------------------------
     # Public API
@@ -297,17 +780,66 @@ class CTraderClient:
         self.access_token = access_token
         logger.info("Account credentials set: %s", account_id)
 
-    def connect(self, on_connect: Optional[Callable] = None):
+    def connect(self, on_connect: Optional[Callable] = None, subscribe_symbols: Optional[Iterable[int]] = None):
+        """
+        Start the connection. subscribe_symbols (symbolIds) are subscribed to spots
+        in the same pipelined startup burst as the auth and SymbolsList requests.
+        Their quotes land in get_last_quote() / the spot batch callback, not in the
+        message callback (see set_message_callback()).
+        """
         self._on_connect_callback = on_connect
+        self._connect_subscribe_ids = list(subscribe_symbols or ())
         logger.info("Connecting to %s:%s...", self.host, self.port)
         self.client.startService()
 
-    def set_message_callback(self, callback: Callable):
+    def set_message_callback(self, callback: Callable, include_spots: bool = False):
+        """
+        callback(message) receives every raw ProtoMessage except spot events once
+        the account is authenticated: those are consumed by the client's quote
+        table (see get_last_quote() / set_spot_batch_callback()). Pass
+        include_spots=True to receive them here as well.
+        """
         self._on_message_callback = callback
+        self._forward_spots = include_spots
+
+    def set_spot_batch_callback(self, callback: Optional[Callable]):
+        """
+        callback(symbol_ids: set) runs once per reactor turn with every symbolId
+        whose quote changed; read the quotes via get_last_quote().
+        """
+        self._on_spot_batch_callback = callback
 
     def send(self, req):
-        """Facade for low-level client.send(req) to reduce coupling."""
-        return self.client.send(req)
+        """
+        Facade for low-level client.send(req) to reduce coupling.
+
+        Safe from any thread: off the reactor thread the request is queued and a
+        burst is handed over with a single callFromThread(); the returned Deferred
+        fires with the response once it arrives, in submission order.
+        """
+        if threadable.isInIOThread():
+            return self.client.send(req)
+
+        d = defer.Deferred()
+        with self._send_queue_lock:
+            self._send_queue.append((req, d))
+            if self._send_drain_scheduled:
+                return d
+            self._send_drain_scheduled = True
+        reactor.callFromThread(self._drain_sends)
+        return d
+
+    def _drain_sends(self) -> None:
+        with self._send_queue_lock:
+            pending = list(self._send_queue)
+            self._send_queue.clear()
+            self._send_drain_scheduled = False
+
+        for req, d in pending:
+            try:
+                self.client.send(req).chainDeferred(d)
+            except Exception:
+                d.errback(Failure())
 
     # ------------------------------------------------------------------
     # Trading (delegated to ctrader_trading_impl.py)
@@ -388,8 +920,22 @@ class CTraderClient:
             symbol_id=symbol_id,
         )
 
-    def close_position(self, *args: Any, **kwargs: Any):
-        return trading_impl.close_position(self, *args, **kwargs)
+    def close_position(
+        self,
+        account_id: Optional[int] = None,
+        position_id: Optional[int] = None,
+        volume: Optional[int] = None,
+        symbol_id: Optional[int] = None,
+        **aliases: Any,
+    ):
+        return trading_impl.close_position(
+            self,
+            account_id=account_id,
+            position_id=position_id,
+            volume=volume,
+            symbol_id=symbol_id,
+            **aliases,
+        )
 
     # ------------------------------------------------------------------
     # Reactor control
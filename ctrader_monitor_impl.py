@@ -3,53 +3,133 @@
 Heartbeat/health helpers extracted from ctrader_client.py.
 
 All functions operate on the CTraderClient instance ("self") and keep using:
-  - self.heartbeat_task
-  - self.health_check_task
+  - self.monitor_task
   - self.heartbeat_interval
   - self.last_message_time
   - self.max_idle_time
   - self.is_connected
   - self.is_app_authed
+  - self.lag_* / self.spot_coalesce (event-loop lag telemetry)
+  - self._msg_count, self._spot_update_count (receive counters)
+
+Heartbeat and idle health check share one LoopingCall (one reactor wake-up per tick).
+Event-loop lag is sampled separately by a self-rescheduling callLater.
 """
 
 import time
 import logging
-from twisted.internet import task
+from typing import Any, Dict
+from twisted.internet import reactor, task
 
 logger = logging.getLogger(__name__)
 
 
-def start_heartbeat(self) -> None:
-    if self.heartbeat_task is None or not self.heartbeat_task.running:
-        self.heartbeat_task = task.LoopingCall(lambda: send_heartbeat(self))
-        self.heartbeat_task.start(self.heartbeat_interval, now=False)
-        logger.info("Heartbeat started")
+# Upper bounds (ms) of the lag histogram buckets; the last bucket is "> 100"
+LAG_BUCKETS_MS = (1, 5, 10, 50, 100)
+LAG_MAX_WINDOW = 60.0
+
+
+def start_monitor(self) -> None:
+    if self.monitor_task is None or not self.monitor_task.running:
+        self.monitor_task = task.LoopingCall(monitor_tick, self)
+        self.monitor_task.start(self.heartbeat_interval, now=False)
+        logger.info("Connection monitor started")
+    start_lag_monitor(self)
+
+
+def start_lag_monitor(self) -> None:
+    if self.lag_call is not None and self.lag_call.active():
+        return
+    self._lag_expected = time.monotonic() + self.lag_interval
+    self.lag_call = reactor.callLater(self.lag_interval, measure_lag, self)
+
+
+def measure_lag(self) -> None:
+    """How late did this call fire? Records the lag and toggles spot coalescing."""
+    now = time.monotonic()
+    lag_ms = max(0.0, (now - self._lag_expected) * 1000.0)
+
+    self.last_lag_ms = lag_ms
+    if now - self._lag_window_start >= LAG_MAX_WINDOW:
+        self._lag_window_start = now
+        self.max_lag_ms_60s = lag_ms
+    elif lag_ms > self.max_lag_ms_60s:
+        self.max_lag_ms_60s = lag_ms
+
+    for i, bound in enumerate(LAG_BUCKETS_MS):
+        if lag_ms <= bound:
+            self.lag_histogram[i] += 1
+            break
+    else:
+        self.lag_histogram[-1] += 1
+
+    # Under reactor starvation, coalesce spot events per symbol (latest bid/ask wins)
+    starved = lag_ms > self.lag_threshold_ms
+    if starved != self.spot_coalesce:
+        self.spot_coalesce = starved
+        if starved:
+            logger.warning("Event-loop lag %.1fms; coalescing spot events per symbol", lag_ms)
+        else:
+            logger.info("Event-loop lag back to %.1fms; applying every spot event directly", lag_ms)
+
+    self._lag_expected = now + self.lag_interval
+    self.lag_call = reactor.callLater(self.lag_interval, measure_lag, self)
+
+
+def get_event_loop_lag(self) -> Dict[str, Any]:
+    labels = ["<=%dms" % b for b in LAG_BUCKETS_MS] + [">%dms" % LAG_BUCKETS_MS[-1]]
+    return {
+        "last_ms": self.last_lag_ms,
+        "max_ms_60s": self.max_lag_ms_60s,
+        "histogram": dict(zip(labels, self.lag_histogram)),
+        "spot_coalesce": self.spot_coalesce,
+    }
+
+
+def monitor_tick(self) -> None:
+    # Protocol heartbeats are sent by the SDK's TcpProtocol when the link is idle,
+    # so the tick only checks health and flushes the receive counters.
+    if self.is_connected:
+        check_connection_health(self)
+    log_receive_stats(self)
+
+
+def log_receive_stats(self) -> None:
+    """Aggregated replacement for per-message receive logging."""
+    msgs, spots = self._msg_count, self._spot_update_count
+    self._msg_count = 0
+    self._spot_update_count = 0
+    if msgs and logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "Received %d messages (%d spot updates) in the last %ss",
+            msgs, spots, self.heartbeat_interval,
+        )
 
 
 def send_heartbeat(self) -> None:
+    """Status probe only (not on the monitor tick); the SDK sends ProtoHeartbeatEvent."""
     if self.is_connected and self.is_app_authed:
         logger.debug("Heartbeat OK")
     else:
         logger.debug("Heartbeat: not ready")
 
 
-def start_health_check(self) -> None:
-    if self.health_check_task is None or not self.health_check_task.running:
-        self.health_check_task = task.LoopingCall(lambda: check_connection_health(self))
-        self.health_check_task.start(30, now=False)
-        logger.info("Health check started")
-
-
 def check_connection_health(self) -> None:
-    idle = time.time() - self.last_message_time
+    # Runs before log_receive_stats resets _msg_count: any traffic since the
+    # previous tick counts as "now", so the receive path never reads the clock.
+    now = time.monotonic()
+    if self._msg_count:
+        self.last_message_time = now
+    idle = now - self.last_message_time
     if idle > self.max_idle_time:
         logger.warning("Connection idle for %.0fs", idle)
 
 
 def stop_periodic_tasks(self) -> None:
-    if self.heartbeat_task and self.heartbeat_task.running:
-        self.heartbeat_task.stop()
-        logger.info("Heartbeat stopped")
-    if self.health_check_task and self.health_check_task.running:
-        self.health_check_task.stop()
-        logger.info("Health check stopped")
+    if self.monitor_task and self.monitor_task.running:
+        self.monitor_task.stop()
+        logger.info("Connection monitor stopped")
+    if self.lag_call is not None and self.lag_call.active():
+        self.lag_call.cancel()
+    self.lag_call = None
+    self.spot_coalesce = False
@@ -7,18 +7,29 @@ Key point (your confirmed debug dump):
 - Full trading specs like lotSize/minVolume/maxVolume/stepVolume are obtained via ProtoOASymbolByIdReq.
 
 This module:
-- Builds self.symbol_name_to_id from SymbolsList
-- Stores basic symbol objects in self.symbol_details
-- Then upgrades self.symbol_details entries with full ProtoOASymbol objects from SymbolById
+- Builds self.symbol_name_to_id (and inverse self.symbol_id_to_name) from SymbolsList
+- Stores a light SymbolSpec per symbol in self.symbol_details (full specs already
+  loaded for a listed symbol are kept, also across reconnects)
+- Then upgrades self.symbol_details entries with the full specs from SymbolById
+  (SymbolSpec copies the fields used here; the protobuf messages are not retained)
+  (and records the price rounding factor float(10 ** digits) in self._round_factor
+  and the (minVolume, maxVolume, stepVolume) tuple in self._volume_spec, unless all zero)
 """
 
 import logging
-from typing import Optional, Iterable, List
+import os
+from functools import lru_cache, partial
+from sys import intern
+from typing import Optional, Iterable, List, Tuple
 
-from ctrader_open_api import Protobuf
+from twisted.internet.defer import DeferredSemaphore
+
+from ctrader_utils import extract_cached
+from volume_converter import div_round_half_even
 from ctrader_open_api.messages.OpenApiMessages_pb2 import (
     ProtoOASymbolsListReq,
     ProtoOASymbolByIdReq,
+    ProtoOAErrorRes,
 )
 
 logger = logging.getLogger(__name__)
@@ -29,12 +40,103 @@ STARTUP_SPOT_SYMBOLS = ["XAUUSD", "BTCUSD"]
 # Temporary: how many symbols to probe for ticking via OpenAPI
 PROBE_SPOT_COUNT = 50
 
+# float(10 ** digits) for the digits brokers actually use (0..10)
+_POW10 = tuple(10.0 ** i for i in range(11))
+
+# CTRADER_DEBUG_SYMBOLS=1 dumps the fields of DEBUG_SYMBOL_NAMES at DEBUG level
+DEBUG_SYMBOLS = os.getenv("CTRADER_DEBUG_SYMBOLS") == "1"
+DEBUG_SYMBOL_NAMES = ("EURAUD", "XAUUSD", "BTCUSD", "US500")
+
+# Max SymbolById requests in flight; the rest wait instead of sitting in the SDK's
+# rate-limited send queue, where their 5s response timeout is already running
+SYMBOL_SPEC_CONCURRENCY = 4
+
+
+class SymbolSpec:
+    """
+    The ProtoOASymbol fields this bridge reads, as plain slot attributes.
+
+    Attribute names match the protobuf fields, so getattr(symbol, "lotSize", 0)
+    callers work unchanged. Light symbols (SymbolsList) only carry symbolId and
+    symbolCategoryId; the rest stay 0 (pipPosition None) until SymbolById arrives.
+    """
+
+    __slots__ = (
+        "symbolId",
+        "symbolCategoryId",
+        "digits",
+        "pipPosition",
+        "lotSize",
+        "minVolume",
+        "maxVolume",
+        "stepVolume",
+    )
+
+    def __init__(
+        self,
+        symbolId: int,
+        symbolCategoryId: int = 0,
+        digits: int = 0,
+        pipPosition: Optional[int] = None,
+        lotSize: int = 0,
+        minVolume: int = 0,
+        maxVolume: int = 0,
+        stepVolume: int = 0,
+    ):
+        self.symbolId = symbolId
+        self.symbolCategoryId = symbolCategoryId
+        self.digits = digits
+        self.pipPosition = pipPosition
+        self.lotSize = lotSize
+        self.minVolume = minVolume
+        self.maxVolume = maxVolume
+        self.stepVolume = stepVolume
+
+    @classmethod
+    def from_light(cls, s) -> "SymbolSpec":
+        return cls(s.symbolId, s.symbolCategoryId)
+
+    @classmethod
+    def from_full(cls, s, symbolCategoryId: int = 0) -> "SymbolSpec":
+        return cls(
+            s.symbolId,
+            symbolCategoryId,
+            s.digits,
+            s.pipPosition,
+            s.lotSize,
+            s.minVolume,
+            s.maxVolume,
+            s.stepVolume,
+        )
+
+    def __repr__(self) -> str:
+        return "SymbolSpec(%s)" % ", ".join("%s=%r" % (k, getattr(self, k)) for k in self.__slots__)
+
+
+class _LazyFields:
+    """Formats a message's set fields only if the log record is actually emitted."""
 
-def load_symbol_map(self, debug_dump: bool = False) -> None:
-    """Request SymbolsList then request full specs by id."""
+    __slots__ = ("_msg",)
+
+    def __init__(self, msg):
+        self._msg = msg
+
+    def __str__(self) -> str:
+        try:
+            return str([(f.name, v) for f, v in self._msg.ListFields()])
+        except Exception as e:
+            return "<dump failed: %s>" % e
+
+
+def _debug_dump_enabled(debug_dump: bool) -> bool:
+    return (debug_dump or DEBUG_SYMBOLS) and logger.isEnabledFor(logging.DEBUG)
+
+
+def load_symbol_map(self, debug_dump: bool = False):
+    """Request SymbolsList then request full specs by id; returns the Deferred."""
     if not getattr(self, "account_id", None):
         logger.warning("Cannot load symbols: account_id not set")
-        return
+        return None
 
     logger.info("Loading symbols for account %s...", self.account_id)
 
@@ -42,47 +144,47 @@ def load_symbol_map(self, debug_dump: bool = False) -> None:
     req.ctidTraderAccountId = int(self.account_id)
 
     d = self.client.send(req)
-    d.addCallback(lambda result: on_symbols_list(self, result, debug_dump=debug_dump))
+    d.addCallback(partial(on_symbols_list, self, debug_dump=debug_dump))
     d.addErrback(self._on_error)
+    return d
 
 
 def on_symbols_list(self, result, debug_dump: bool = False) -> None:
     """Parse SymbolsList (light symbols) then fetch full specs via SymbolById."""
     try:
-        msg = Protobuf.extract(result)
+        msg = extract_cached(result)
         symbols = getattr(msg, "symbol", None)
         if not symbols:
             logger.error("SymbolsList response has no symbols field: %r", msg)
             return
 
-        self.symbol_name_to_id.clear()
-        self.symbol_details.clear()
-
-        ids: List[int] = []
-
-        for s in symbols:
-            try:
-                name = (getattr(s, "symbolName", "") or "").upper()
-                sid = int(getattr(s, "symbolId", 0) or 0)
-                if not name or not sid:
-                    continue
-
-                self.symbol_name_to_id[name] = sid
-                self.symbol_details[sid] = s
-                ids.append(sid)
-
-                if debug_dump and name in ("EURAUD", "XAUUSD", "BTCUSD", "US500"):
-                    try:
-                        if hasattr(s, "ListFields"):
-                            fields = [(f.name, v) for f, v in s.ListFields()]
-                            logger.info("DBG LIGHT SYMBOL %s id=%s fields=%s", name, sid, fields)
-                        else:
-                            logger.info("DBG LIGHT SYMBOL %s id=%s repr=%r", name, sid, s)
-                    except Exception as e:
-                        logger.info("DBG LIGHT SYMBOL dump failed for %s: %s", name, e)
-
-            except Exception:
-                continue
+        # Build the maps in one pass of comprehensions (rebinding, as on disconnect).
+        # Names are interned so both maps share one string object per symbol.
+        entries = [
+            (intern(s.symbolName.upper()), s.symbolId, s)
+            for s in symbols
+            if s.symbolName and s.symbolId
+        ]
+        self.symbol_name_to_id = {name: sid for name, sid, _ in entries}
+        self.symbol_id_to_name = {sid: name for name, sid, _ in entries}
+        # Full specs from an earlier load (e.g. before a reconnect) are carried over,
+        # so request_symbol_specs only asks for the symbols still missing them.
+        # Delisted ids drop out of all three tables.
+        old_details = self.symbol_details
+        details = {}
+        for _, sid, s in entries:
+            spec = old_details.get(sid)
+            details[sid] = spec if _has_full_spec(spec) else SymbolSpec.from_light(s)
+        self.symbol_details = details
+        self._round_factor = {sid: f for sid, f in self._round_factor.items() if sid in details}
+        self._volume_spec = {sid: v for sid, v in self._volume_spec.items() if sid in details}
+
+        ids: List[int] = list(self.symbol_id_to_name)
+
+        if _debug_dump_enabled(debug_dump):
+            for name, sid, s in entries:
+                if name in DEBUG_SYMBOL_NAMES:
+                    logger.debug("DBG LIGHT SYMBOL %s id=%s fields=%s", name, sid, _LazyFields(s))
 
         logger.info("Loaded %d symbols (light)", len(self.symbol_name_to_id))
 
@@ -111,13 +213,12 @@ def on_symbols_list(self, result, debug_dump: bool = False) -> None:
         except Exception as e:
             logger.error("Failed probe spot subscription: %s", e)
 
-        # Track total batches expected for deferred spot subscription
-        total_batches = (len(ids) + 199) // 200  # ceiling division matching batch_size=200
-        self._symbol_batch_total = int(total_batches)
+        # Batch counters for the deferred spot subscription (request_symbol_specs adds to the total)
+        self._symbol_batch_total = 0
         self._symbol_batch_done = 0
 
         # Now request full symbol specs (lotSize/minVolume/stepVolume/etc.).
-        request_symbol_specs(self, ids, batch_size=200, debug_dump=debug_dump)
+        request_symbol_specs(self, ids, debug_dump=debug_dump)
 
     except Exception:
         logger.exception("Failed parsing symbols list")
@@ -134,80 +235,121 @@ def _chunked(items: Iterable[int], n: int) -> Iterable[List[int]]:
         yield chunk
 
 
-def request_symbol_specs(self, symbol_ids: List[int], batch_size: int = 200, debug_dump: bool = False) -> None:
+def _has_full_spec(spec: Optional[SymbolSpec]) -> bool:
+    # pipPosition is a required ProtoOASymbol field, so only full specs have it
+    return spec is not None and spec.pipPosition is not None
+
+
+def request_symbol_specs(
+    self,
+    symbol_ids: List[int],
+    batch_size: Optional[int] = None,
+    debug_dump: bool = False,
+    retry: bool = True,
+) -> None:
     """
-    Request full ProtoOASymbol entities for symbol_ids and merge into self.symbol_details.
+    Request full ProtoOASymbol entities for symbol_ids and merge their specs into self.symbol_details.
 
-    Some OpenApiPy builds model req.symbolId as a repeated field; we use extend/append safely.
+    Symbols whose full specs are already loaded are skipped (if that leaves nothing to
+    fetch, the startup spot subscription runs right away). batch_size defaults to
+    self.symbol_spec_batch_size; a batch the server rejects is retried once in halves.
     """
     if not getattr(self, "account_id", None):
         return
+    details = self.symbol_details
+    symbol_ids = [sid for sid in symbol_ids if not _has_full_spec(details.get(sid))]
     if not symbol_ids:
+        # Every spec is already loaded (e.g. after a reconnect): no batch will reach the
+        # completion check in on_symbol_specs, so the startup subscription runs now
+        if not getattr(self, "_symbol_batch_total", 0):
+            logger.info("Full specs already loaded for all symbols")
+            _subscribe_startup_spots(self)
         return
 
-    sent = 0
-    for batch in _chunked(symbol_ids, int(batch_size or 200)):
+    batches = list(_chunked(symbol_ids, int(batch_size or self.symbol_spec_batch_size)))
+    self._symbol_batch_total = int(getattr(self, "_symbol_batch_total", 0)) + len(batches)
+
+    sem = DeferredSemaphore(SYMBOL_SPEC_CONCURRENCY)
+    for batch in batches:
         req = ProtoOASymbolByIdReq()
         req.ctidTraderAccountId = int(self.account_id)
+        # batch is already a list of int symbolIds; extend() takes it as-is
+        req.symbolId.extend(batch)
 
-        # Common Python protobuf API: repeated field supports extend()
-        try:
-            req.symbolId.extend([int(s) for s in batch])
-        except Exception:
-            # Fallback: append one-by-one
-            for sid in batch:
-                try:
-                    req.symbolId.append(int(sid))
-                except Exception:
-                    pass
-
-        d = self.client.send(req)
-        d.addCallback(lambda result, dd=debug_dump: on_symbol_specs(self, result, debug_dump=dd))
+        d = sem.run(self.client.send, req)
+        d.addCallback(partial(on_symbol_specs, self, debug_dump=debug_dump, batch=batch, retry=retry))
         d.addErrback(self._on_error)
-        sent += len(batch)
 
-    logger.info("Requested full specs for %d symbols (batched)", sent)
+    logger.info("Requested full specs for %d symbols (%d batches)", len(symbol_ids), len(batches))
+
 
+def _retry_symbol_specs(self, msg, batch: Optional[List[int]], retry: bool, debug_dump: bool) -> None:
+    """SymbolById came back as ProtoOAErrorRes: retry the batch once in halves."""
+    if not (retry and batch and len(batch) > 1):
+        logger.warning("SymbolById request failed: %s %s", msg.errorCode, msg.description)
+        return
+    half = (len(batch) + 1) // 2
+    self.symbol_spec_batch_size = min(int(self.symbol_spec_batch_size), half)
+    logger.warning(
+        "SymbolById rejected %d symbols (%s); retrying in batches of %d",
+        len(batch),
+        msg.errorCode,
+        half,
+    )
+    request_symbol_specs(self, batch, batch_size=half, debug_dump=debug_dump, retry=False)
 
-def on_symbol_specs(self, result, debug_dump: bool = False) -> None:
-    """Merge full ProtoOASymbol entities into symbol_details."""
+
+def on_symbol_specs(
+    self,
+    result,
+    debug_dump: bool = False,
+    batch: Optional[List[int]] = None,
+    retry: bool = False,
+) -> None:
+    """Merge full ProtoOASymbol specs into symbol_details."""
     try:
-        msg = Protobuf.extract(result)
-        symbols = getattr(msg, "symbol", None)
-        if not symbols:
-            logger.warning("SymbolById response has no symbol field: %r", msg)
-            return
+        msg = extract_cached(result)
+        if isinstance(msg, ProtoOAErrorRes):
+            _retry_symbol_specs(self, msg, batch, retry, debug_dump)
+            symbols = None
+        else:
+            symbols = getattr(msg, "symbol", None)
+            if not symbols:
+                logger.warning("SymbolById response has no symbol field: %r", msg)
+
+        debug_ids = ()
+        if symbols and _debug_dump_enabled(debug_dump):
+            debug_ids = {self.symbol_name_to_id.get(n) for n in DEBUG_SYMBOL_NAMES}
 
         updated = 0
-        for s in symbols:
+        for s in symbols or ():
             try:
                 sid = int(getattr(s, "symbolId", 0) or 0)
                 if not sid:
                     continue
 
-                # Replace light symbol with full symbol
-                self.symbol_details[sid] = s
+                # Replace light symbol with full specs (category only comes from SymbolsList)
+                light = self.symbol_details.get(sid)
+                self.symbol_details[sid] = SymbolSpec.from_full(s, light.symbolCategoryId if light else 0)
+                if s.HasField("digits"):
+                    digits = s.digits
+                    self._round_factor[sid] = _POW10[digits] if 0 <= digits < len(_POW10) else float(10 ** digits)
+                vspec = (int(s.minVolume or 0), int(s.maxVolume or 0), int(s.stepVolume or 0))
+                if any(vspec):
+                    self._volume_spec[sid] = vspec
+                else:
+                    # No volume constraints: snap_volume_for_symbol returns the input as-is
+                    self._volume_spec.pop(sid, None)
                 updated += 1
 
-                if debug_dump and sid in (
-                    self.symbol_name_to_id.get("EURAUD", -1),
-                    self.symbol_name_to_id.get("XAUUSD", -1),
-                    self.symbol_name_to_id.get("BTCUSD", -1),
-                    self.symbol_name_to_id.get("US500", -1),
-                ):
-                    try:
-                        if hasattr(s, "ListFields"):
-                            fields = [(f.name, v) for f, v in s.ListFields()]
-                            logger.info("DBG FULL SYMBOL id=%s fields=%s", sid, fields)
-                        else:
-                            logger.info("DBG FULL SYMBOL id=%s repr=%r", sid, s)
-                    except Exception as e:
-                        logger.info("DBG FULL SYMBOL dump failed for %s: %s", sid, e)
+                if sid in debug_ids:
+                    logger.debug("DBG FULL SYMBOL id=%s fields=%s", sid, _LazyFields(s))
 
             except Exception:
                 continue
 
-        logger.info("Loaded full specs for %d symbols", updated)
+        if updated:
+            logger.info("Loaded full specs for %d symbols", updated)
 
     except Exception:
         logger.exception("Failed parsing symbol specs response")
@@ -233,7 +375,8 @@ def on_symbol_specs(self, result, debug_dump: bool = False) -> None:
 
 def _subscribe_startup_spots(self) -> None:
     """
-    Called once after ALL symbol spec batches have loaded.
+    Called once after ALL symbol spec batches have loaded (or from request_symbol_specs
+    when no batch was needed).
     Subscribes to STARTUP_SPOT_SYMBOLS for spot quotes.
     """
     account_id = getattr(self, "account_id", None)
@@ -276,28 +419,50 @@ def _subscribe_startup_spots(self) -> None:
 
 def get_symbol_id_by_name(self, name: str) -> Optional[int]:
     """Lookup symbolId by symbol name (case-insensitive)."""
-    return self.symbol_name_to_id.get((name or "").upper())
+    # Names are usually passed upper-case already: try as-is before upper()
+    m = self.symbol_name_to_id
+    sid = m.get(name)
+    if sid is not None or not name:
+        return sid
+    return m.get(name.upper())
 
 
 def round_price_for_symbol(self, symbol_id: int, price: float) -> float:
     """
     Round price using symbol digits if available on FULL symbol;
     if not available, return as-is.
-    """
-    symbol = self.symbol_details.get(int(symbol_id))
-    if symbol is None:
-        return float(price)
 
-    digits = getattr(symbol, "digits", None)
-    if digits is None:
-        return float(price)
-
-    try:
-        digits = int(digits)
-        factor = 10 ** digits
-        return round(float(price) * factor) / factor
-    except Exception:
-        return float(price)
+    Divides by the factor rather than multiplying by a cached 1 / factor:
+    the reciprocal is inexact (round(1.2345 * 1e5) * 1e-5 != 1.2345).
+    """
+    factor = self._round_factor.get(symbol_id)
+    if factor is None:
+        if type(symbol_id) is int:
+            return float(price)
+        factor = self._round_factor.get(int(symbol_id))
+        if factor is None:
+            return float(price)
+    return round(float(price) * factor) / factor
+
+
+def round_prices_for_symbol(
+    self, symbol_id: int, prices: Tuple[Optional[float], ...]
+) -> Tuple[Optional[float], ...]:
+    """
+    Round several prices for one symbol with a single factor lookup.
+    None entries stay None; zero/negative entries are returned unrounded.
+    """
+    factor = self._round_factor.get(symbol_id)
+    if factor is None and type(symbol_id) is not int:
+        factor = self._round_factor.get(int(symbol_id))
+    out = []
+    for p in prices:
+        if p is not None:
+            p = float(p)
+            if factor is not None and p > 0:
+                p = round(p * factor) / factor
+        out.append(p)
+    return tuple(out)
 
 
 def snap_volume_for_symbol(self, symbol_id: int, volume_units: int) -> int:
@@ -306,14 +471,24 @@ def snap_volume_for_symbol(self, symbol_id: int, volume_units: int) -> int:
     If specs are missing/zero, returns the input volume_units unchanged.
     """
     v = int(volume_units or 0)
-    symbol = self.symbol_details.get(int(symbol_id))
-    if symbol is None:
+    spec = self._volume_spec.get(int(symbol_id))
+    if spec is None:
+        return v
+
+    # Fast path: volume already inside [min, max] and on the step grid
+    min_v, max_v, step_v = spec
+    if step_v > 0 and v >= min_v and (max_v <= 0 or v <= max_v) and (v - min_v) % step_v == 0:
         return v
 
-    min_v = int(getattr(symbol, "minVolume", 0) or 0)
-    max_v = int(getattr(symbol, "maxVolume", 0) or 0)
-    step_v = int(getattr(symbol, "stepVolume", 0) or 0)
+    return _snap_volume(v, min_v, max_v, step_v)
 
+
+@lru_cache(maxsize=4096)
+def _snap_volume(v: int, min_v: int, max_v: int, step_v: int) -> int:
+    """
+    Pure clamp/step-snap, memoized on (volume, specs).
+    Keyed on the spec values themselves, so spec reloads never serve stale results.
+    """
     if min_v > 0:
         v = max(v, min_v)
     if max_v > 0:
@@ -321,8 +496,7 @@ def snap_volume_for_symbol(self, symbol_id: int, volume_units: int) -> int:
 
     if step_v > 0:
         base = min_v if min_v > 0 else 0
-        steps = round((v - base) / float(step_v))
-        v = base + int(steps) * step_v
+        v = base + div_round_half_even(v - base, step_v) * step_v
         if min_v > 0:
             v = max(v, min_v)
 
@@ -5,15 +5,18 @@ Trading helpers extracted from ctrader_client.py.
 Design goal: reduce ctrader_client.py size without breaking API/attribute names.
 All functions operate on the CTraderClient instance ("self") and keep using:
   - self.is_account_authed
-  - self.snap_volume_for_symbol(), self.round_price_for_symbol()
+  - self.snap_volume_for_symbol(), self.round_price_for_symbol(),
+    self.round_prices_for_symbol()
   - self.send(req)  (facade over low-level client.send)
   - self._on_error  (errback)
+  - self._request_templates  (per-account protobuf request templates)
 """
 
 import logging
+import re
 from typing import Optional, Any
 
-from ctrader_open_api import Protobuf
+from ctrader_utils import extract_cached
 from ctrader_open_api.messages.OpenApiMessages_pb2 import (
     ProtoOANewOrderReq,
     ProtoOAAmendPositionSLTPReq,
@@ -28,24 +31,136 @@ from ctrader_open_api.messages.OpenApiModelMessages_pb2 import (
 
 logger = logging.getLogger(__name__)
 
+# Resolve enum values once instead of going through the enum wrapper per order
+_MARKET = int(ProtoOAOrderType.MARKET)
+_LIMIT = int(ProtoOAOrderType.LIMIT)
+_STOP = int(ProtoOAOrderType.STOP)
+_STOP_LIMIT = int(ProtoOAOrderType.STOP_LIMIT)
+_GTD = int(ProtoOATimeInForce.GOOD_TILL_DATE)
+_BUY = int(ProtoOATradeSide.BUY)
+_SELL = int(ProtoOATradeSide.SELL)
+
+# side string -> ProtoOATradeSide; other spellings fall back to side.lower() == "buy"
+_SIDE_MAP = {"BUY": _BUY, "buy": _BUY, "Buy": _BUY, "SELL": _SELL, "sell": _SELL, "Sell": _SELL}
+
+# 'MT5_<ticket>' order/position labels
+_MT5_LABEL_MATCH = re.compile(r"MT5_([0-9]+)\Z").match
+
+# Alternate keyword names still accepted by close_position()
+_CLOSE_POSITION_ALIASES = ("pos_id", "position")
+_CLOSE_VOLUME_ALIASES = ("qty", "volume_cents")
+
+
+def _as_int(value) -> int:
+    """int() coercion that skips the call when value is already an int."""
+    return value if type(value) is int else int(value)
+
+
+def _as_float(value) -> float:
+    """float() coercion that skips the call when value is already a float."""
+    return value if type(value) is float else float(value)
+
+
+def _pick(d: dict, keys):
+    """First non-None d[k] for k in keys, else None."""
+    for k in keys:
+        v = d.get(k)
+        if v is not None:
+            return v
+    return None
+
+
+def _set_limit(kw: dict, stop_price: float, limit_price: float) -> None:
+    if not limit_price > 0.0:
+        raise ValueError("LIMIT pending order requires limit_price > 0")
+    kw["orderType"] = _LIMIT
+    kw["limitPrice"] = limit_price
+
+
+def _set_stop(kw: dict, stop_price: float, limit_price: float) -> None:
+    if not stop_price > 0.0:
+        raise ValueError("STOP pending order requires stop_price > 0")
+    kw["orderType"] = _STOP
+    kw["stopPrice"] = stop_price
+
+
+def _set_stop_limit(kw: dict, stop_price: float, limit_price: float) -> None:
+    if not stop_price > 0.0:
+        raise ValueError("STOP_LIMIT pending order requires stop_price > 0")
+    if not limit_price > 0.0:
+        raise ValueError("STOP_LIMIT pending order requires limit_price > 0")
+    kw["orderType"] = _STOP_LIMIT
+    kw["stopPrice"] = stop_price
+    kw["limitPrice"] = limit_price
+
+
+# pending_type -> writes orderType and its price fields into the request kwargs
+_PENDING_TYPE_SETTERS = {"limit": _set_limit, "stop": _set_stop, "stop_limit": _set_stop_limit}
+
+
+def _trade_side(side: str) -> int:
+    ts = _SIDE_MAP.get(side)
+    if ts is None:
+        ts = _BUY if side.lower() == "buy" else _SELL
+    return ts
+
+
+def _from_template(self, key: str, req_cls, account_id: int, **preset):
+    """
+    Return a fresh req_cls pre-filled from a cached per-account template.
+    CopyFrom() copies the invariant fields in one C-level call instead of
+    re-running the descriptor-checked setters on every request.
+    """
+    tpl_key = (key, account_id)
+    tpl = self._request_templates.get(tpl_key)
+    if tpl is None:
+        tpl = req_cls(ctidTraderAccountId=account_id, **preset)
+        self._request_templates[tpl_key] = tpl
+    req = req_cls()
+    req.CopyFrom(tpl)
+    return req
+
 
 def _parse_mt5_ticket_from_label(label: str) -> Optional[int]:
     """
     Expected label format: 'MT5_<ticket>' (e.g., MT5_1468550799).
     Returns int ticket if parsable, else None.
     """
-    if not label:
-        return None
-    s = str(label).strip()
-    if not s.startswith("MT5_"):
-        return None
-    tail = s[4:]
-    if not tail.isdigit():
-        return None
-    try:
-        return int(tail)
-    except Exception:
+    if not isinstance(label, str):
         return None
+    m = _MT5_LABEL_MATCH(label)
+    return int(m.group(1)) if m else None
+
+
+class _LazyExtract:
+    """Extracts a response message only if the log record is actually emitted."""
+
+    __slots__ = ("_result",)
+
+    def __init__(self, result):
+        self._result = result
+
+    def __repr__(self) -> str:
+        try:
+            return repr(extract_cached(self._result))
+        except Exception:
+            return "(raw) %r" % (self._result,)
+
+
+def _log_market_resp(result):
+    logger.info("Order response: %r", _LazyExtract(result))
+
+
+def _log_pending_resp(result):
+    logger.info("Pending order response: %r", _LazyExtract(result))
+
+
+def _log_cancel_resp(result):
+    logger.info("Cancel order response: %r", _LazyExtract(result))
+
+
+def _log_amend_resp(result):
+    logger.info("Amend response: %r", _LazyExtract(result))
 
 
 def amend_position(
@@ -89,32 +204,27 @@ def send_market_order(
 
     volume = self.snap_volume_for_symbol(symbol_id, volume)
 
-    req = ProtoOANewOrderReq()
-    req.ctidTraderAccountId = int(account_id)
-    req.symbolId = int(symbol_id)
-    req.orderType = ProtoOAOrderType.MARKET
-    req.tradeSide = ProtoOATradeSide.BUY if side.lower() == "buy" else ProtoOATradeSide.SELL
-    req.volume = int(volume)
+    req = _from_template(self, "market", ProtoOANewOrderReq, _as_int(account_id), orderType=_MARKET)
+    req.symbolId = _as_int(symbol_id)
+    req.tradeSide = _trade_side(side)
+    req.volume = _as_int(volume)
 
-    if sl is not None and float(sl) > 0.0:
-        req.stopLoss = float(sl)
-    if tp is not None and float(tp) > 0.0:
-        req.takeProfit = float(tp)
+    if sl is not None:
+        sl = _as_float(sl)
+        if sl > 0.0:
+            req.stopLoss = sl
+    if tp is not None:
+        tp = _as_float(tp)
+        if tp > 0.0:
+            req.takeProfit = tp
 
     req.label = label
 
-    logger.info("Sending market order: %s %s units of symbol %s", side, volume, symbol_id)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Sending market order: %s %s units of symbol %s", side, volume, symbol_id)
 
     d = self.send(req)
-
-    def _on_resp(result):
-        try:
-            logger.info("Order response: %r", Protobuf.extract(result))
-        except Exception:
-            logger.warning("Order response (raw): %r", result)
-
-    d.addCallback(_on_resp)
-    d.addErrback(self._on_error)
+    d.addCallbacks(_log_market_resp, self._on_error)
     return d
 
 
@@ -138,92 +248,62 @@ def send_pending_order(
     if not self.is_account_authed:
         raise RuntimeError("Account not authenticated yet")
 
-    ptype = (pending_type or "").strip().lower()
-    if ptype not in ("limit", "stop", "stop_limit"):
-        raise ValueError(f"Unsupported pending_type: {pending_type}")
-
-    volume = self.snap_volume_for_symbol(symbol_id, int(volume))
-
-    # Round all prices to symbol precision
-    stop_price = float(stop_price or 0.0)
-    limit_price = float(limit_price or 0.0)
-    if stop_price > 0:
-        stop_price = self.round_price_for_symbol(symbol_id, stop_price)
-    if limit_price > 0:
-        limit_price = self.round_price_for_symbol(symbol_id, limit_price)
-    if sl is not None and float(sl) > 0:
-        sl = self.round_price_for_symbol(symbol_id, float(sl))
-    if tp is not None and float(tp) > 0:
-        tp = self.round_price_for_symbol(symbol_id, float(tp))
-
-    req = ProtoOANewOrderReq()
-    req.ctidTraderAccountId = int(account_id)
-    req.symbolId = int(symbol_id)
-    req.tradeSide = ProtoOATradeSide.BUY if side.lower() == "buy" else ProtoOATradeSide.SELL
-    req.volume = int(volume)
-    req.label = str(label)
-
-    if ptype == "limit":
-        if not (limit_price and float(limit_price) > 0.0):
-            raise ValueError("LIMIT pending order requires limit_price > 0")
-        req.orderType = ProtoOAOrderType.LIMIT
-        req.limitPrice = float(limit_price)
-    elif ptype == "stop":
-        if not (stop_price and float(stop_price) > 0.0):
-            raise ValueError("STOP pending order requires stop_price > 0")
-        req.orderType = ProtoOAOrderType.STOP
-        req.stopPrice = float(stop_price)
-    else:
-        if not (stop_price and float(stop_price) > 0.0):
-            raise ValueError("STOP_LIMIT pending order requires stop_price > 0")
-        if not (limit_price and float(limit_price) > 0.0):
-            raise ValueError("STOP_LIMIT pending order requires limit_price > 0")
-        req.orderType = ProtoOAOrderType.STOP_LIMIT
-        req.stopPrice = float(stop_price)
-        req.limitPrice = float(limit_price)
-
-    if sl is not None and float(sl) > 0.0:
-        req.stopLoss = float(sl)
-    if tp is not None and float(tp) > 0.0:
-        req.takeProfit = float(tp)
-
-    if expiration_ms and int(expiration_ms) > 0:
-        req.timeInForce = ProtoOATimeInForce.GOOD_TILL_DATE
-        req.expirationTimestamp = int(expiration_ms)
+    ptype = pending_type
+    set_order_type = _PENDING_TYPE_SETTERS.get(ptype)
+    if set_order_type is None:
+        # Normalise only when the caller did not already pass a clean lower-case name
+        ptype = (pending_type or "").strip().lower()
+        set_order_type = _PENDING_TYPE_SETTERS.get(ptype)
+        if set_order_type is None:
+            raise ValueError(f"Unsupported pending_type: {pending_type}")
 
-    logger.info(
-        "Sending pending order: type=%s side=%s vol=%s symbol=%s stop=%s limit=%s SL=%s TP=%s exp=%s label=%s",
-        ptype,
-        side,
-        volume,
-        symbol_id,
-        stop_price,
-        limit_price,
-        sl,
-        tp,
-        int(expiration_ms or 0),
-        label,
-    )
-
-    d = self.send(req)
-
-    def _on_resp(result):
-        try:
-            extracted = Protobuf.extract(result)
-            logger.info("Pending order response: %r", extracted)
+    volume = self.snap_volume_for_symbol(symbol_id, _as_int(volume))
 
-            # OPTIONAL: if you want to update a map here, you can:
-            # label = getattr(getattr(getattr(extracted, "order", None), "tradeData", None), "label", None)
-            # order_id = getattr(getattr(extracted, "order", None), "orderId", None)
-            # ticket = _parse_mt5_ticket_from_label(label or "")
-            # if ticket and order_id:
-            #     self.pending_order_ids_by_ticket[ticket] = int(order_id)
+    # Round all prices to symbol precision (one lookup; each value floated once)
+    stop_price, limit_price, sl, tp = self.round_prices_for_symbol(
+        symbol_id, (stop_price or 0.0, limit_price or 0.0, sl, tp)
+    )
 
-        except Exception:
-            logger.warning("Pending order response (raw): %r", result)
+    # Collect the fields and build the message in one constructor call
+    kw = {
+        "ctidTraderAccountId": _as_int(account_id),
+        "symbolId": _as_int(symbol_id),
+        "tradeSide": _trade_side(side),
+        "volume": _as_int(volume),
+        "label": str(label),
+    }
+
+    set_order_type(kw, stop_price, limit_price)
+
+    if sl is not None and sl > 0.0:
+        kw["stopLoss"] = sl
+    if tp is not None and tp > 0.0:
+        kw["takeProfit"] = tp
+
+    expiration_ms = _as_int(expiration_ms or 0)
+    if expiration_ms > 0:
+        kw["timeInForce"] = _GTD
+        kw["expirationTimestamp"] = expiration_ms
+
+    req = ProtoOANewOrderReq(**kw)
+
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "Sending pending order: type=%s side=%s vol=%s symbol=%s stop=%s limit=%s SL=%s TP=%s exp=%s label=%s",
+            ptype,
+            side,
+            volume,
+            symbol_id,
+            stop_price,
+            limit_price,
+            sl,
+            tp,
+            expiration_ms,
+            label,
+        )
 
-    d.addCallback(_on_resp)
-    d.addErrback(self._on_error)
+    d = self.send(req)
+    d.addCallbacks(_log_pending_resp, self._on_error)
     return d
 
 
@@ -234,22 +314,12 @@ def cancel_pending_order(self, account_id: int, order_id: int):
     if not self.is_account_authed:
         raise RuntimeError("Account not authenticated yet")
 
-    req = ProtoOACancelOrderReq()
-    req.ctidTraderAccountId = int(account_id)
-    req.orderId = int(order_id)
+    req = ProtoOACancelOrderReq(ctidTraderAccountId=_as_int(account_id), orderId=_as_int(order_id))
 
     logger.info("Cancelling pending orderId=%s on account %s", order_id, account_id)
 
     d = self.send(req)
-
-    def _on_resp(result):
-        try:
-            logger.info("Cancel order response: %r", Protobuf.extract(result))
-        except Exception:
-            logger.warning("Cancel order response (raw): %r", result)
-
-    d.addCallback(_on_resp)
-    d.addErrback(self._on_error)
+    d.addCallbacks(_log_cancel_resp, self._on_error)
     return d
 
 
@@ -266,25 +336,29 @@ def modify_position(
 
     orig_sl, orig_tp = sl, tp
 
-    if sl is not None and float(sl) <= 0.0:
-        sl = None
-    if tp is not None and float(tp) <= 0.0:
-        tp = None
+    if sl is not None:
+        sl = _as_float(sl)
+        if sl <= 0.0:
+            sl = None
+    if tp is not None:
+        tp = _as_float(tp)
+        if tp <= 0.0:
+            tp = None
 
     if symbol_id is not None:
+        round_price = self.round_price_for_symbol
         if sl is not None:
-            sl = self.round_price_for_symbol(symbol_id, sl)
+            sl = round_price(symbol_id, sl)
         if tp is not None:
-            tp = self.round_price_for_symbol(symbol_id, tp)
+            tp = round_price(symbol_id, tp)
 
-    req = ProtoOAAmendPositionSLTPReq()
-    req.ctidTraderAccountId = int(account_id)
-    req.positionId = int(position_id)
+    req = _from_template(self, "amend", ProtoOAAmendPositionSLTPReq, _as_int(account_id))
+    req.positionId = _as_int(position_id)
 
     if sl is not None:
-        req.stopLoss = float(sl)
+        req.stopLoss = sl
     if tp is not None:
-        req.takeProfit = float(tp)
+        req.takeProfit = tp
 
     logger.info(
         "Modifying position %s: SL %s→%s, TP %s→%s",
@@ -296,40 +370,31 @@ def modify_position(
     )
 
     d = self.send(req)
-
-    def _on_resp(result):
-        try:
-            logger.info("Amend response: %r", Protobuf.extract(result))
-        except Exception:
-            logger.warning("Amend response (raw): %r", result)
-
-    d.addCallback(_on_resp)
-    d.addErrback(self._on_error)
+    d.addCallbacks(_log_amend_resp, self._on_error)
     return d
 
 
-def close_position(self, *args: Any, **kwargs: Any):
+def close_position(
+    self,
+    account_id: Optional[int] = None,
+    position_id: Optional[int] = None,
+    volume: Optional[int] = None,
+    symbol_id: Optional[int] = None,
+    **aliases: Any,
+):
     """
-    Compatible close.
+    Close (fully or partially) a position.
 
-    Requires:
-      (account_id, position_id, volume[, symbol_id])
-    Accepts alt keyword names:
+    Canonical call:
+      close_position(account_id, position_id, volume[, symbol_id])
+    Deprecated alt keyword names (still accepted):
       pos_id, position, qty, volume_cents
     """
-    account_id = kwargs.get("account_id")
-    position_id = kwargs.get("position_id", kwargs.get("pos_id", kwargs.get("position")))
-    volume = kwargs.get("volume", kwargs.get("qty", kwargs.get("volume_cents")))
-    symbol_id = kwargs.get("symbol_id")
-
-    if account_id is None and len(args) >= 1:
-        account_id = args[0]
-    if position_id is None and len(args) >= 2:
-        position_id = args[1]
-    if volume is None and len(args) >= 3:
-        volume = args[2]
-    if symbol_id is None and len(args) >= 4:
-        symbol_id = args[3]
+    if aliases:
+        if position_id is None:
+            position_id = _pick(aliases, _CLOSE_POSITION_ALIASES)
+        if volume is None:
+            volume = _pick(aliases, _CLOSE_VOLUME_ALIASES)
 
     if account_id is None or position_id is None or volume is None:
         raise TypeError("close_position requires (account_id, position_id, volume[, symbol_id])")
@@ -337,20 +402,20 @@ def close_position(self, *args: Any, **kwargs: Any):
     if not self.is_account_authed:
         raise RuntimeError("Account not authenticated yet")
 
-    account_id = int(account_id)
-    position_id = int(position_id)
-    volume = int(volume)
+    account_id = _as_int(account_id)
+    position_id = _as_int(position_id)
+    volume = _as_int(volume)
 
     if symbol_id is not None:
-        symbol_id = int(symbol_id)
+        symbol_id = _as_int(symbol_id)
         volume = self.snap_volume_for_symbol(symbol_id, volume)
 
-    req = ProtoOAClosePositionReq()
-    req.ctidTraderAccountId = account_id
+    req = _from_template(self, "close", ProtoOAClosePositionReq, account_id)
     req.positionId = position_id
     req.volume = volume
 
-    logger.info("Closing position %s: %s units", position_id, volume)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Closing position %s: %s units", position_id, volume)
 
     d = self.send(req)
     d.addErrback(self._on_error)
@@ -2,9 +2,10 @@
 Initializes accounts and starts the HTTP server.
 """
 from threading import Thread
-from twisted.internet import reactor
 from config_loader import get_multi_account_config
-from account_manager import get_account_manager
+from account_manager import get_account_manager  # installs epoll/kqueue reactor first
+from twisted.internet import reactor
+from google.protobuf.internal import api_implementation
 from bridge_server import run_http_server
 from app_state import logger
 import traceback
@@ -15,6 +16,7 @@ def main():
     logger.info("=" * 70)
     logger.info("MT5 to cTrader Copy Trading Bridge - Multi-Account Version")
     logger.info("=" * 70)
+    logger.info(f"protobuf backend: {api_implementation.Type()}")
     logger.info("Loading account configurations...")
 
     try:
@@ -4,12 +4,16 @@ Receives trade events from MT5 EA via JSON and forwards to multiple cTrader acco
 """
 import json
 import logging
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from threading import Thread
-from twisted.internet import reactor
+import queue
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
+from typing import Tuple
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from threading import Lock, Thread
 
 from config_loader import get_multi_account_config
-from account_manager import get_account_manager
+from account_manager import get_account_manager  # installs epoll/kqueue reactor first
+from twisted.internet import reactor
 from symbol_mapper import SymbolMapper
 from volume_converter import convert_mt5_lots_to_ctrader_cents
 
@@ -24,15 +28,121 @@ logger = logging.getLogger(__name__)
 # Global pending SL/TP map: ticket -> dict(symbol, sl, tp)
 PENDING_SLTP = {}
 
+# Identical for every accepted event, so serialized once
+_OK_RESPONSE = json.dumps({"status": "success", "message": "Trade event received"}).encode("utf-8")
+
+# Fallback sizing when a symbol has no cTrader details: metals are sent in units
+# (min 100), everything else in cents of units (min 1000 units).
+_METAL_TOKENS = ("XAU", "XAG", "GOLD", "SILVER")
+
+
+@lru_cache(maxsize=1024)
+def _fallback_volume_rule(sym_upper: str) -> Tuple[int, int]:
+    """(volume multiplier, minimum volume) for the fallback path, classified once per symbol."""
+    if any(metal in sym_upper for metal in _METAL_TOKENS):
+        return 1, 100
+    return 100, 1000 * 100
+
+
+# Guards the per-account trade counters (requests are handled on several threads)
+_COUNTER_LOCK = Lock()
+
+# Per-account SymbolMapper cache: account name -> (broker map, prefix, suffix, custom map, mapper)
+_MAPPERS = {}
+
+
+def _symbol_mapper(account_name, client, config) -> SymbolMapper:
+    """
+    Reuse one SymbolMapper per account while its inputs are unchanged.
+    A symbol reload replaces client.symbol_name_to_id, which invalidates the entry.
+    """
+    broker_map = client.symbol_name_to_id
+    cached = _MAPPERS.get(account_name)
+    if (
+        cached is not None
+        and cached[0] is broker_map
+        and cached[1] == config.symbol_prefix
+        and cached[2] == config.symbol_suffix
+        and cached[3] is config.custom_symbols
+    ):
+        return cached[4]
+
+    mapper = SymbolMapper(
+        prefix=config.symbol_prefix,
+        suffix=config.symbol_suffix,
+        custom_map=config.custom_symbols,
+        broker_symbol_map=broker_map,
+    )
+    _MAPPERS[account_name] = (broker_map, config.symbol_prefix, config.symbol_suffix, config.custom_symbols, mapper)
+    return mapper
+
+
+def _reserve_trade_slot(config) -> bool:
+    """
+    Count one trade against the account's daily/position limits, atomically with
+    the limit check, so concurrent OPEN requests cannot overshoot them.
+    """
+    with _COUNTER_LOCK:
+        if config.daily_trade_count >= config.max_daily_trades:
+            return False
+        if config.current_positions >= config.max_concurrent_positions:
+            return False
+        config.daily_trade_count += 1
+        config.current_positions += 1
+        return True
+
+
+def _release_trade_slot(config):
+    """Give back a slot taken by _reserve_trade_slot() whose order was never sent."""
+    with _COUNTER_LOCK:
+        config.daily_trade_count = max(0, config.daily_trade_count - 1)
+        config.current_positions = max(0, config.current_positions - 1)
+
+
+def _submit_open(account_name, client, config, order):
+    """Send one prepared market order; its trade slot is already reserved."""
+    try:
+        client.send_market_order(**order)
+    except Exception:
+        _release_trade_slot(config)
+        raise
+
+    logger.info(
+        "✓ [%s] Order sent successfully (daily: %s/%s)",
+        account_name,
+        config.daily_trade_count,
+        config.max_daily_trades,
+    )
+
+
+def _batch_send(batch, ticket=None, apply_sltp=None):
+    """
+    Reactor thread: submit every (account_name, client, config, order) back to back,
+    so all accounts' requests are written within the same reactor iteration.
+    apply_sltp(account_name, client, config, ticket) runs after each successful send.
+    """
+    for account_name, client, config, order in batch:
+        try:
+            _submit_open(account_name, client, config, order)
+            if apply_sltp is not None:
+                apply_sltp(account_name, client, config, ticket)
+        except Exception as e:
+            logger.error(f"Failed to copy trade to {account_name}: {e}", exc_info=True)
+
 
 class MT5BridgeHandler(BaseHTTPRequestHandler):
     """HTTP request handler for MT5 trade events."""
 
     account_manager = None
 
+    # Buffer the response so status line, headers and body leave in one send()
+    # when the request finishes, instead of one unbuffered write per call.
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
     def log_message(self, format, *args):
         """Override to use Python logging instead of printing."""
-        logger.info(f"{self.address_string()} - {format%args}")
+        logger.info("%s - %s", self.address_string(), format % args)
 
     def do_POST(self):
         """Handle POST request with trade event JSON."""
@@ -40,18 +150,12 @@ class MT5BridgeHandler(BaseHTTPRequestHandler):
             content_length = int(self.headers["Content-Length"])
             post_data = self.rfile.read(content_length)
 
-            trade_event = json.loads(post_data.decode("utf-8"))
-            logger.info(f"Received trade event: {trade_event}")
+            trade_event = json.loads(post_data)  # bytes in: no separate decode copy
+            logger.info("Received trade event: %s", trade_event)
 
             self._process_trade_event(trade_event)
 
-            self.send_response(200)
-            self.send_header("Content-type", "application/json")
-            self.end_headers()
-            response = json.dumps(
-                {"status": "success", "message": "Trade event received"}
-            )
-            self.wfile.write(response.encode("utf-8"))
+            self._send_json(_OK_RESPONSE)
 
         except json.JSONDecodeError as e:
             logger.error(f"Invalid JSON: {e}")
@@ -74,9 +178,6 @@ class MT5BridgeHandler(BaseHTTPRequestHandler):
             for name, (client, config) in accounts.items()
         }
 
-        self.send_response(200)
-        self.send_header("Content-type", "application/json")
-        self.end_headers()
         response = json.dumps(
             {
                 "status": "online",
@@ -85,8 +186,16 @@ class MT5BridgeHandler(BaseHTTPRequestHandler):
                 "accounts": account_status,
             },
             indent=2,
-        )
-        self.wfile.write(response.encode("utf-8"))
+        ).encode("utf-8")
+        self._send_json(response)
+
+    def _send_json(self, body: bytes):
+        """Write a 200 JSON response with an explicit Content-Length."""
+        self.send_response(200)
+        self.send_header("Content-type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
 
     def _process_trade_event(self, event):
         """Process trade event and forward to all enabled cTrader accounts."""
@@ -98,14 +207,11 @@ class MT5BridgeHandler(BaseHTTPRequestHandler):
         if event_type:
             event_type = event_type.lower()
 
-        if event_type == "open":
-            self._handle_open(event)
-        elif event_type == "modify":
-            self._handle_modify(event)
-        elif event_type == "close":
-            self._handle_close(event)
-        else:
+        handler = self._EVENT_HANDLERS.get(event_type)
+        if handler is None:
             logger.error(f"Unknown event type: {event_type}")
+            return
+        handler(self, event)
 
     def _try_apply_pending_sltp(self, account_name, client, config, ticket):
         """Try to apply pending SL/TP for a ticket if positionId is now known."""
@@ -121,12 +227,7 @@ class MT5BridgeHandler(BaseHTTPRequestHandler):
         sl = float(pending.get("sl", 0.0))
         tp = float(pending.get("tp", 0.0))
 
-        mapper = SymbolMapper(
-            prefix=config.symbol_prefix,
-            suffix=config.symbol_suffix,
-            custom_map=config.custom_symbols,
-            broker_symbol_map=client.symbol_name_to_id,
-        )
+        mapper = _symbol_mapper(account_name, client, config)
         symbol_id = mapper.get_symbol_id(mt5_symbol) if mt5_symbol else None
 
         sl_arg = sl if sl > 0 else None
@@ -164,8 +265,12 @@ class MT5BridgeHandler(BaseHTTPRequestHandler):
         magic = event.get("magic", 0)
 
         logger.info(
-            f"Opening {side} order: {volume} lots of {mt5_symbol} "
-            f"(ticket #{ticket}, magic {magic})"
+            "Opening %s order: %s lots of %s (ticket #%s, magic %s)",
+            side,
+            volume,
+            mt5_symbol,
+            ticket,
+            magic,
         )
 
         # Store pending SL/TP if provided
@@ -177,6 +282,8 @@ class MT5BridgeHandler(BaseHTTPRequestHandler):
             }
 
         accounts = self.account_manager.get_all_accounts()
+        multi_config = get_multi_account_config()
+        batch = []
 
         for account_name, (client, config) in accounts.items():
             try:
@@ -192,14 +299,20 @@ class MT5BridgeHandler(BaseHTTPRequestHandler):
                     tp,
                     magic,
                     event,
+                    multi_config,
+                    batch,
                 )
-                # Try to apply pending SL/TP immediately after order sent
-                self._try_apply_pending_sltp(account_name, client, config, ticket)
             except Exception as e:
                 logger.error(
                     f"Failed to copy trade to {account_name}: {e}", exc_info=True
                 )
 
+        # Hand the whole fan-out to the reactor in one wake-up. Pending SL/TP is
+        # tried after each send; it only applies once the ticket's positionId is
+        # mapped, otherwise the next MODIFY/CLOSE event for the ticket retries it.
+        if batch:
+            reactor.callFromThread(_batch_send, batch, ticket, self._try_apply_pending_sltp)
+
     def _copy_open_to_account(
         self,
         account_name,
@@ -213,27 +326,30 @@ class MT5BridgeHandler(BaseHTTPRequestHandler):
         tp,
         magic,
         raw_event,
+        multi_config=None,
+        batch=None,
     ):
-        """Copy open order to a specific account."""
+        """
+        Copy open order to a specific account.
+
+        With a batch list the prepared order is appended to it (see _batch_send)
+        instead of being sent right away.
+        """
         if not client or not client.is_app_authed:
             logger.warning(f"[{account_name}] Client not ready, skipping")
             return
 
-        multi_config = get_multi_account_config()
+        if multi_config is None:
+            multi_config = get_multi_account_config()
 
         should_copy, reason = multi_config.should_copy_trade(
             config, mt5_symbol, magic, volume
         )
         if not should_copy:
-            logger.info(f"[{account_name}] Skipping: {reason}")
+            logger.info("[%s] Skipping: %s", account_name, reason)
             return
 
-        mapper = SymbolMapper(
-            prefix=config.symbol_prefix,
-            suffix=config.symbol_suffix,
-            custom_map=config.custom_symbols,
-            broker_symbol_map=client.symbol_name_to_id,
-        )
+        mapper = _symbol_mapper(account_name, client, config)
 
         symbol_id = mapper.get_symbol_id(mt5_symbol)
         if symbol_id is None:
@@ -259,28 +375,14 @@ class MT5BridgeHandler(BaseHTTPRequestHandler):
             base_units = mapper.lots_to_units(adjusted_lots, mt5_symbol)
             sym_upper = (mt5_symbol or "").upper()
 
-            if any(metal in sym_upper for metal in ["XAU", "XAG", "GOLD", "SILVER"]):
-                min_units = 100
-                units = int(base_units)
-                if units < min_units:
-                    logger.warning(
-                        f"[{account_name}] Volume {units} below minimum {min_units}, "
-                        f"adjusting to {min_units} units"
-                    )
-                    units = min_units
-                volume_to_send = units
-            else:
-                units = int(base_units)
-                cents = units * 100
-                min_units = 1000
-                min_cents = min_units * 100
-                if cents < min_cents:
-                    logger.warning(
-                        f"[{account_name}] Volume {cents} below minimum {min_cents}, "
-                        f"adjusting to {min_cents}"
-                    )
-                    cents = min_cents
-                volume_to_send = cents
+            scale, min_volume = _fallback_volume_rule(sym_upper)
+            volume_to_send = int(base_units) * scale
+            if volume_to_send < min_volume:
+                logger.warning(
+                    f"[{account_name}] Volume {volume_to_send} below minimum {min_volume}, "
+                    f"adjusting to {min_volume}"
+                )
+                volume_to_send = min_volume
         else:
             lot_size_cents = getattr(symbol, "lotSize", 0)
             min_volume_cents = getattr(symbol, "minVolume", 0)
@@ -299,39 +401,49 @@ class MT5BridgeHandler(BaseHTTPRequestHandler):
             )
 
             logger.info(
-                f"[{account_name}] Volume conversion: symbol_id={symbol_id}, "
-                f"mt5_lots={adjusted_lots:.4f}, mt5_contract_size={mt5_contract_size}, "
-                f"lotSize={lot_size_cents}, min={min_volume_cents}, "
-                f"max={max_volume_cents}, step={step_volume_cents} -> "
-                f"volume_cents={volume_to_send}"
+                "[%s] Volume conversion: symbol_id=%s, mt5_lots=%.4f, mt5_contract_size=%s, "
+                "lotSize=%s, min=%s, max=%s, step=%s -> volume_cents=%s",
+                account_name,
+                symbol_id,
+                adjusted_lots,
+                mt5_contract_size,
+                lot_size_cents,
+                min_volume_cents,
+                max_volume_cents,
+                step_volume_cents,
+                volume_to_send,
             )
 
-        # Send market order without SL/TP
-        final_sl = None
-        final_tp = None
-
         logger.info(
-            f"[{account_name}] Sending: symbol_id={symbol_id}, side={side}, "
-            f"volume={volume_to_send} (from {volume} lots * {config.lot_multiplier})"
+            "[%s] Sending: symbol_id=%s, side=%s, volume=%s (from %s lots * %s)",
+            account_name,
+            symbol_id,
+            side,
+            volume_to_send,
+            volume,
+            config.lot_multiplier,
         )
 
-        client.send_market_order(
+        # Market order without SL/TP
+        order = dict(
             account_id=config.account_id,
             symbol_id=symbol_id,
             side=side,
             volume=volume_to_send,
-            sl=final_sl,
-            tp=final_tp,
+            sl=None,
+            tp=None,
             label=f"MT5_{ticket}",
         )
 
-        config.daily_trade_count += 1
-        config.current_positions += 1
+        # Reserve the slot now (handler thread), not when the reactor sends
+        if not _reserve_trade_slot(config):
+            logger.info("[%s] Skipping: trade limits reached", account_name)
+            return
 
-        logger.info(
-            f"✓ [{account_name}] Order sent successfully "
-            f"(daily: {config.daily_trade_count}/{config.max_daily_trades})"
-        )
+        if batch is not None:
+            batch.append((account_name, client, config, order))
+        else:
+            _submit_open(account_name, client, config, order)
 
     def _handle_modify(self, event):
         """Handle position modification event."""
@@ -367,12 +479,7 @@ class MT5BridgeHandler(BaseHTTPRequestHandler):
                 mt5_symbol = event.get("symbol")
                 symbol_id = None
                 if mt5_symbol:
-                    mapper = SymbolMapper(
-                        prefix=config.symbol_prefix,
-                        suffix=config.symbol_suffix,
-                        custom_map=config.custom_symbols,
-                        broker_symbol_map=client.symbol_name_to_id,
-                    )
+                    mapper = _symbol_mapper(account_name, client, config)
                     symbol_id = mapper.get_symbol_id(mt5_symbol)
 
                 sl_arg = sl if sl > 0 else None
@@ -460,12 +567,7 @@ class MT5BridgeHandler(BaseHTTPRequestHandler):
                     min(adjusted_lots, config.max_lot_size),
                 )
 
-                mapper = SymbolMapper(
-                    prefix=config.symbol_prefix,
-                    suffix=config.symbol_suffix,
-                    custom_map=config.custom_symbols,
-                    broker_symbol_map=client.symbol_name_to_id,
-                )
+                mapper = _symbol_mapper(account_name, client, config)
                 symbol_id = mapper.get_symbol_id(mt5_symbol)
 
                 mt5_contract_size = float(event.get("mt5_contract_size", 1.0))
@@ -485,13 +587,8 @@ class MT5BridgeHandler(BaseHTTPRequestHandler):
                     )
                     base_units = mapper.lots_to_units(adjusted_lots, mt5_symbol)
                     sym_upper = (mt5_symbol or "").upper()
-                    if any(
-                        metal in sym_upper
-                        for metal in ["XAU", "XAG", "GOLD", "SILVER"]
-                    ):
-                        volume_to_send = int(base_units)
-                    else:
-                        volume_to_send = int(base_units) * 100
+                    scale, _ = _fallback_volume_rule(sym_upper)
+                    volume_to_send = int(base_units) * scale
                 else:
                     lot_size_cents = getattr(symbol, "lotSize", 0)
                     min_volume_cents = getattr(symbol, "minVolume", 0)
@@ -527,17 +624,52 @@ class MT5BridgeHandler(BaseHTTPRequestHandler):
                     exc_info=True,
                 )
 
+    # Lower-cased event type -> handler (plain functions; a handler instance lives for one request)
+    _EVENT_HANDLERS = {
+        "open": _handle_open,
+        "modify": _handle_modify,
+        "close": _handle_close,
+    }
+
 
 def run_http_server(host: str = "127.0.0.1", port: int = 3140):
-    """Run HTTP server in a separate thread."""
-    server = HTTPServer((host, port), MT5BridgeHandler)
+    """
+    Run HTTP server in a separate thread.
+
+    Each connection is handled on its own (daemon) thread, so a slow client or a
+    burst from several EAs does not queue behind one request. A single EA still
+    sees its events in order: WebRequest() waits for each response.
+    """
+    server = ThreadingHTTPServer((host, port), MT5BridgeHandler)
     logger.info(f"MT5 Bridge Server listening on {host}:{port}")
     logger.info("Waiting for trade events from MT5 EA...")
     server.serve_forever()
 
 
+def _start_log_listener() -> QueueListener:
+    """
+    Route root logging through a queue so handler I/O (stdout writes) happens on
+    the listener's background thread instead of the request and reactor threads.
+    """
+    root = logging.getLogger()
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *root.handlers, respect_handler_level=True)
+    root.handlers = [QueueHandler(log_queue)]
+    listener.start()
+    return listener
+
+
 def main():
     """Main entry point for the bridge server."""
+    listener = _start_log_listener()
+    try:
+        _run()
+    finally:
+        listener.stop()
+        logging.getLogger().handlers = list(listener.handlers)
+
+
+def _run():
     logger.info("=" * 70)
     logger.info("MT5 to cTrader Copy Trading Bridge - Multi-Account Version")
     logger.info("=" * 70)
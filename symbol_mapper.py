@@ -49,6 +49,10 @@ class SymbolMapper:
             k.upper(): int(v) for k, v in (broker_symbol_map or {}).items()
         }
 
+        # MT5 symbol -> resolved symbolId. The inputs above are fixed for the mapper's
+        # lifetime, so a hit stays valid; misses are not cached (they keep warning).
+        self._symbol_id_cache: Dict[str, int] = {}
+
         logger.info(
             "Symbol mapper initialized: prefix='%s', suffix='%s', custom_map=%s, broker_symbol_map_size=%d, strict=%s",
             self.prefix,
@@ -96,6 +100,10 @@ class SymbolMapper:
         2) Look up in dynamic broker_symbol_map.
         3) If missing: return None (strict mode) and log a warning.
         """
+        symbol_id = self._symbol_id_cache.get(mt5_symbol)
+        if symbol_id is not None:
+            return symbol_id
+
         ctrader_symbol = self.mt5_to_ctrader_name(mt5_symbol)
         key = ctrader_symbol.upper()
 
@@ -116,7 +124,9 @@ class SymbolMapper:
                 ctrader_symbol,
                 symbol_id,
             )
-            return int(symbol_id)
+            symbol_id = int(symbol_id)
+            self._symbol_id_cache[mt5_symbol] = symbol_id
+            return symbol_id
 
         logger.warning(
             "No symbolId found in broker map for %s (normalized: %s). "
@@ -0,0 +1,244 @@
+"""
+Unit tests for CTraderClient's spot quote cache, spot subscriptions and the
+thread-safe send() queue. No network: the low-level Open API client is replaced
+by FakeOpenApiClient and the reactor by a task.Clock that also queues
+callFromThread() calls.
+"""
+
+import threading
+
+import pytest
+from twisted.internet import defer, task
+from twisted.python import threadable
+
+import ctrader_client
+from ctrader_client import MAX_SPOT_SYMBOLS_PER_REQ, CTraderClient, SpotQuoteTable
+from ctrader_open_api.messages.OpenApiCommonMessages_pb2 import ProtoMessage
+from ctrader_open_api.messages.OpenApiMessages_pb2 import (
+    ProtoOAErrorRes,
+    ProtoOASpotEvent,
+    ProtoOASubscribeSpotsReq,
+    ProtoOASubscribeSpotsRes,
+    ProtoOAVersionReq,
+)
+
+
+class FakeReactor(task.Clock):
+    """task.Clock plus a callFromThread() queue that the test drains explicitly."""
+
+    def __init__(self):
+        super().__init__()
+        self.from_thread = []
+
+    def callFromThread(self, f, *args, **kwargs):
+        self.from_thread.append((f, args, kwargs))
+
+    def run_from_thread_calls(self):
+        calls, self.from_thread = self.from_thread, []
+        for f, args, kwargs in calls:
+            f(*args, **kwargs)
+
+
+class FakeOpenApiClient:
+    """Records every request; each returns a Deferred the test fires by hand."""
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, req):
+        d = defer.Deferred()
+        self.sent.append((req, d))
+        return d
+
+
+def _response(msg):
+    """Wrap a response the way the SDK delivers it: a ProtoMessage envelope."""
+    return ProtoMessage(payloadType=msg.payloadType, payload=msg.SerializeToString())
+
+
+@pytest.fixture
+def fake_reactor(monkeypatch):
+    r = FakeReactor()
+    monkeypatch.setattr(ctrader_client, "reactor", r)
+    # The test thread plays the reactor thread for send()'s isInIOThread() check
+    monkeypatch.setattr(threadable, "ioThread", threadable.getThreadID())
+    return r
+
+
+@pytest.fixture
+def client(monkeypatch, fake_reactor):
+    monkeypatch.setattr(ctrader_client, "_load_app_credentials", lambda force=False: None)
+    monkeypatch.setattr(ctrader_client, "_CTRADER_CLIENT_ID", "id")
+    monkeypatch.setattr(ctrader_client, "_CTRADER_CLIENT_SECRET", "secret")
+    c = CTraderClient()
+    c.client = FakeOpenApiClient()
+    return c
+
+
+# ----------------------------------------------------------------------
+# SpotQuoteTable
+# ----------------------------------------------------------------------
+
+def test_quote_table_evicts_least_recently_updated():
+    table = SpotQuoteTable(max_symbols=2)
+    table.update(1, 1.1, 1.2, 10)
+    table.update(2, 2.1, 2.2, 20)
+    table.update(1, 1.3, 1.4, 30)  # 2 is now the least recently updated
+    table.update(3, 3.1, 3.2, 40)
+
+    assert len(table) == 2
+    assert 2 not in table
+    assert table.get(1).bid == 1.3
+    assert table.get(3).ask == 3.2
+
+
+def test_quote_table_reuses_discarded_rows():
+    table = SpotQuoteTable(max_symbols=8)
+    table.update(1, 1.1, 1.2, 10)
+    table.update(2, 2.1, 2.2, 20)
+    row = table._rows[1]
+
+    table.discard(1)
+    table.update(5, 5.1, 5.2, 50)
+
+    assert table._rows[5] == row
+    assert table.get(1) is None
+    assert (table.get(5).bid, table.get(5).ask, table.get(5).ts) == (5.1, 5.2, 50)
+
+
+def test_quote_table_keeps_missing_side():
+    table = SpotQuoteTable()
+    table.update(1, None, 1.2, 10)  # first quote without a bid: side starts at 0.0
+    assert (table.get(1).bid, table.get(1).ask) == (0.0, 1.2)
+
+    table.update(1, 1.1, None, 11)
+    table.update(1, None, 1.3, 12)
+    quote = table.get(1)
+    assert (quote.bid, quote.ask, quote.ts) == (1.1, 1.3, 12)
+    assert quote["bid"] == quote.get("bid") == 1.1
+    assert quote.get("mid") is None
+    with pytest.raises(KeyError):
+        quote["mid"]
+
+
+def _spot(symbol_id, bid=None, ask=None, ts=0):
+    event = ProtoOASpotEvent(ctidTraderAccountId=1, symbolId=symbol_id, timestamp=ts)
+    if bid is not None:
+        event.bid = bid
+    if ask is not None:
+        event.ask = ask
+    return event
+
+
+def test_spot_events_coalesce_per_symbol_under_lag(client, fake_reactor):
+    client.spot_quotes.update(7, 100, 200, 1)
+    client.spot_coalesce = True
+
+    client._on_spot_event(_spot(7, bid=101, ts=2))
+    client._on_spot_event(_spot(7, ask=202, ts=3))
+    assert client.get_last_quote(7).bid == 100  # not applied before the flush
+
+    fake_reactor.advance(0)
+    quote = client.get_last_quote(7)
+    assert (quote.bid, quote.ask, quote.ts) == (101, 202, 3)
+    assert client._spot_update_count == 1
+
+
+# ----------------------------------------------------------------------
+# Debounced spot subscriptions
+# ----------------------------------------------------------------------
+
+def test_subscribe_debounce_sends_one_request_and_fans_out(client, fake_reactor):
+    d1 = client.subscribe_spots(account_id=1, symbol_ids=[10, 11])
+    d2 = client.subscribe_spots(account_id=1, symbol_ids=[11, 12])
+    assert client.client.sent == []
+
+    fake_reactor.advance(client.spot_subscribe_debounce)
+    assert len(client.client.sent) == 1
+    req, d = client.client.sent[0]
+    assert isinstance(req, ProtoOASubscribeSpotsReq)
+    assert list(req.symbolId) == [10, 11, 12]
+
+    results = []
+    d1.addCallback(results.append)
+    d2.addCallback(results.append)
+    res = _response(ProtoOASubscribeSpotsRes(ctidTraderAccountId=1))
+    d.callback(res)
+    assert results == [res, res]
+    assert client._active_spot_subs == {10, 11, 12}
+
+
+def test_subscribe_rejection_errbacks_waiters_and_rolls_back(client, fake_reactor):
+    d1 = client.subscribe_spots(account_id=1, symbol_ids=[10])
+    d2 = client.subscribe_spots(account_id=1, symbol_ids=[11])
+    fake_reactor.advance(client.spot_subscribe_debounce)
+
+    failures = []
+    d1.addErrback(failures.append)
+    d2.addErrback(failures.append)
+    # The server rejects through the response callback, not an errback
+    client.client.sent[0][1].callback(_response(ProtoOAErrorRes(errorCode="INVALID_SYMBOL")))
+
+    assert len(failures) == 2
+    assert all("INVALID_SYMBOL" in str(f.value) for f in failures)
+    assert client._active_spot_subs == set()
+
+    # Rolled back ids can be subscribed again
+    client.subscribe_spots(account_id=1, symbol_ids=[10])
+    fake_reactor.advance(client.spot_subscribe_debounce)
+    assert list(client.client.sent[-1][0].symbolId) == [10]
+
+
+def test_split_subscribe_rolls_back_only_the_failed_batch(client, fake_reactor):
+    client.spot_subscribe_debounce = 0
+    ids = list(range(1, MAX_SPOT_SYMBOLS_PER_REQ + 2))
+    failures = []
+    client.subscribe_spots(account_id=1, symbol_ids=ids).addErrback(failures.append)
+
+    (first_req, first_d), (second_req, second_d) = client.client.sent
+    assert list(first_req.symbolId) == ids[:MAX_SPOT_SYMBOLS_PER_REQ]
+    assert list(second_req.symbolId) == ids[MAX_SPOT_SYMBOLS_PER_REQ:]
+
+    first_d.callback(_response(ProtoOASubscribeSpotsRes(ctidTraderAccountId=1)))
+    second_d.callback(_response(ProtoOAErrorRes(errorCode="INVALID_SYMBOL")))
+
+    assert len(failures) == 1
+    assert "INVALID_SYMBOL" in str(failures[0].value)
+    assert client._active_spot_subs == set(ids[:MAX_SPOT_SYMBOLS_PER_REQ])
+
+
+# ----------------------------------------------------------------------
+# Thread-safe send()
+# ----------------------------------------------------------------------
+
+def test_send_from_other_thread_drains_burst_with_one_wakeup(client, fake_reactor):
+    reqs = [ProtoOAVersionReq() for _ in range(3)]
+    deferreds = []
+
+    def worker():
+        deferreds.extend(client.send(r) for r in reqs)
+
+    t = threading.Thread(target=worker)
+    t.start()
+    t.join()
+
+    assert len(fake_reactor.from_thread) == 1
+    assert client.client.sent == []
+
+    fake_reactor.run_from_thread_calls()
+    assert [id(req) for req, _ in client.client.sent] == [id(r) for r in reqs]
+
+    results = []
+    for d in deferreds:
+        d.addCallback(results.append)
+    for i, (_, d) in enumerate(client.client.sent):
+        d.callback(i)
+    assert results == [0, 1, 2]
+
+
+def test_send_on_reactor_thread_goes_straight_to_client(client, fake_reactor):
+    req = ProtoOAVersionReq()
+    d = client.send(req)
+
+    assert fake_reactor.from_thread == []
+    assert client.client.sent == [(req, d)]
@@ -5,6 +5,7 @@ Handles volume conversion and order placement.
 
 from config_loader import get_multi_account_config
 from symbol_mapper import SymbolMapper
+from volume_converter import div_round_half_even
 from app_state import logger
 
 
@@ -18,21 +19,23 @@ def _snap_volume_units(
     Clamp and snap cTrader Open API volume (UNITS) to broker constraints.
     """
     v = int(volume_units or 0)
+    min_units = int(min_units or 0)
+    max_units = int(max_units or 0)
+    step_units = int(step_units or 0)
 
-    if min_units and int(min_units) > 0:
-        v = max(v, int(min_units))
-    if max_units and int(max_units) > 0:
-        v = min(v, int(max_units))
+    if min_units > 0:
+        v = max(v, min_units)
+    if max_units > 0:
+        v = min(v, max_units)
 
-    if step_units and int(step_units) > 0:
-        base = int(min_units) if (min_units and int(min_units) > 0) else 0
-        steps = round((v - base) / float(step_units))
-        v = base + int(steps) * int(step_units)
+    if step_units > 0:
+        base = min_units if min_units > 0 else 0
+        v = base + div_round_half_even(v - base, step_units) * step_units
 
-    if min_units and int(min_units) > 0:
-        v = max(v, int(min_units))
+    if min_units > 0:
+        v = max(v, min_units)
 
-    return int(v)
+    return v
 
 
 def _map_symbol_id(client, config, mt5_symbol: str):
@@ -90,7 +93,7 @@ def _calc_volume_units(account_name, client, config, symbol_id: int, mt5_symbol:
     return int(snapped)
 
 
-def copy_open_to_account(
+def prepare_open_order(
     account_name,
     client,
     config,
@@ -102,15 +105,19 @@ def copy_open_to_account(
     tp,
     magic,
 ):
-    """Execute a new market order on cTrader for a given account."""
+    """
+    Map, filter and size a new market order for one account.
+
+    Returns the send_market_order() keyword arguments, or None when the order is skipped.
+    """
 
     symbol_id = _map_symbol_id(client, config, mt5_symbol)
     if symbol_id is None:
         logger.error(f"[{account_name}] Could not map MT5 symbol {mt5_symbol} to cTrader symbolId")
-        return
+        return None
 
     if not _should_copy(account_name, config, mt5_symbol, magic, volume):
-        return
+        return None
 
     adjusted_lots = getattr(config, "lot_multiplier", 1.0) * float(volume)
     adjusted_lots = max(
@@ -129,7 +136,7 @@ def copy_open_to_account(
 
     if volume_to_send <= 0:
         logger.warning(f"[{account_name}] Skipping zero or negative volume for ticket {ticket}")
-        return
+        return None
 
     trade_side = "BUY" if side.upper() in ("BUY", "LONG") else "SELL"
 
@@ -139,23 +146,15 @@ def copy_open_to_account(
         f"Label: MT5_{ticket}"
     )
 
-    try:
-        response = client.send_market_order(
-            account_id=config.account_id,
-            symbol_id=symbol_id,
-            side=trade_side,
-            volume=volume_to_send,  # UNITS (as cTrader expects)
-            sl=None,  # SL/TP applied separately via pending mechanism (trade_processor.py)
-            tp=None,
-            label=f"MT5_{ticket}",
-        )
-
-        logger.info(f"[{account_name}] Order submitted for MT5 ticket {ticket}")
-        return response
-
-    except Exception as e:
-        logger.error(f"[{account_name}] Failed to open position for ticket {ticket}: {e}")
-        raise
+    return dict(
+        account_id=config.account_id,
+        symbol_id=symbol_id,
+        side=trade_side,
+        volume=volume_to_send,  # UNITS (as cTrader expects)
+        sl=None,  # SL/TP applied separately via pending mechanism (trade_processor.py)
+        tp=None,
+        label=f"MT5_{ticket}",
+    )
 
 
 def copy_pending_to_account(
@@ -6,7 +6,7 @@ Processes incoming MT5 trade events and routes them to appropriate handlers.
 import time
 
 from app_state import logger, PENDING_SLTP, MASTER_OPEN_LOTS
-from trade_executor import copy_open_to_account, copy_pending_to_account
+from trade_executor import prepare_open_order, copy_pending_to_account
 from symbol_mapper import SymbolMapper
 
 
@@ -330,6 +330,7 @@ def handle_open_event(data, account_manager):
     if (sl and sl > 0) or (tp and tp > 0):
         PENDING_SLTP[int(ticket)] = {"symbol": mt5_symbol, "sl": float(sl), "tp": float(tp)}
 
+    orders = []
     for account_name, (client, config) in account_manager.get_all_accounts().items():
         try:
             lots, decision = _resolve_open_volume_for_account(
@@ -345,7 +346,7 @@ def handle_open_event(data, account_manager):
 
             logger.info(f"[{account_name}] OPEN sizing: {decision}, lots={float(lots):.4f}")
 
-            copy_open_to_account(
+            order = prepare_open_order(
                 account_name=account_name,
                 client=client,
                 config=config,
@@ -357,9 +358,15 @@ def handle_open_event(data, account_manager):
                 tp=tp,
                 magic=magic,
             )
+            if order is not None:
+                orders.append((account_name, order))
         except Exception as e:
             logger.error(f"[{account_name}] Failed to copy OPEN event: {e}")
 
+    # Size every account first, then submit the whole fan-out in one pass
+    if orders:
+        account_manager.dispatch_market_order_multi(orders)
+
 
 def handle_pending_open_event(data, account_manager):
     """
@@ -3,10 +3,26 @@
 Handles conversion of MT5 lots to cTrader volume in cents of units.
 """
 import logging
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
 
+def div_round_half_even(n: int, d: int) -> int:
+    """
+    round(n / d) for ints (d > 0), computed exactly.
+
+    Same half-to-even rule as round() on the float quotient, but without the float
+    division, which loses precision once n / d exceeds 2 ** 53.
+    """
+    q, r = divmod(n, d)
+    twice = 2 * r
+    if twice > d or (twice == d and q & 1):
+        q += 1
+    return q
+
+
+@lru_cache(maxsize=4096)
 def convert_mt5_lots_to_ctrader_cents(
     mt5_lots: float,
     mt5_contract_size: float,
@@ -33,36 +49,45 @@ def convert_mt5_lots_to_ctrader_cents(
 
     Returns:
         Volume in cents of units for cTrader
-    """
-    # 1) Underlying units represented on MT5 side
-    mt5_units = mt5_lots * mt5_contract_size
 
+    Pure function of its arguments, so results are memoized: copied orders repeat a
+    handful of lot sizes per symbol, and a cache hit skips the whole conversion.
+    """
+    # 1) Underlying units represented on MT5 side. Mapping them into cTrader lots
+    #    and back (units / units_per_lot * units_per_lot) is the identity, so the
+    #    round trip is skipped whenever cTrader's units per lot is positive.
     if lot_size_cents <= 0:
         units_per_lot_ctrader = mt5_contract_size or 1.0
     else:
         units_per_lot_ctrader = lot_size_cents / 100.0
 
-    # 2) Map MT5 units into cTrader "lots" for this symbol
-    if units_per_lot_ctrader <= 0:
-        target_lots_ctrader = mt5_lots
+    if units_per_lot_ctrader > 0:
+        target_units = mt5_lots * mt5_contract_size
     else:
-        target_lots_ctrader = mt5_units / units_per_lot_ctrader
+        target_units = mt5_lots * units_per_lot_ctrader
 
-    # 3) Convert cTrader lots back to units, then to cents-of-units
-    target_units = target_lots_ctrader * units_per_lot_ctrader
+    # 2) Convert units to cents-of-units
     target_cents = int(round(target_units * 100))
 
-    # 4) Clamp to broker [min, max] in cents
+    # Fast path: already within [min, max] and on the step grid, so 3) and 4) are no-ops
+    if (
+        step_volume_cents and step_volume_cents > 0
+        and target_cents >= (min_volume_cents or 0)
+        and (not max_volume_cents or max_volume_cents <= 0 or target_cents <= max_volume_cents)
+        and (target_cents - max(min_volume_cents or 0, 0)) % step_volume_cents == 0
+    ):
+        return target_cents
+
+    # 3) Clamp to broker [min, max] in cents
     if min_volume_cents and min_volume_cents > 0:
         target_cents = max(target_cents, min_volume_cents)
     if max_volume_cents and max_volume_cents > 0:
         target_cents = min(target_cents, max_volume_cents)
 
-    # 5) Snap to stepVolume in cents
+    # 4) Snap to stepVolume in cents
     if step_volume_cents and step_volume_cents > 0:
         base = min_volume_cents if (min_volume_cents and min_volume_cents > 0) else 0
-        steps = (target_cents - base) / step_volume_cents
-        steps = round(steps)
-        target_cents = base + int(steps) * step_volume_cents
+        steps = div_round_half_even(target_cents - base, int(step_volume_cents))
+        target_cents = base + steps * step_volume_cents
 
     return max(target_cents, min_volume_cents or 0)